@@ -1,4 +1,5 @@
 import sqlite3
+from book_resolver import BookResolver
 
 print("📚 Adding Topics to Bible Database...")
 
@@ -267,18 +268,20 @@ topics_data = {
 
 print("   Adding topic verses...")
 
+cursor.execute("SELECT book_id, book_name FROM books ORDER BY book_id")
+resolver = BookResolver(cursor.fetchall())
+
 for topic_name, verses in topics_data.items():
     for book_name, chapter, verse in verses:
-        # Get book_id
-        cursor.execute("SELECT book_id FROM books WHERE book_name LIKE ?", (f'%{book_name}%',))
-        result = cursor.fetchone()
+        book_id = resolver.resolve(book_name)
         
-        if result:
-            book_id = result[0]
+        if book_id is not None:
             cursor.execute(
                 "INSERT INTO topics (topic_name, book_id, chapter, verse) VALUES (?, ?, ?, ?)",
                 (topic_name, book_id, chapter, verse)
             )
+        else:
+            print(f"   ⚠️ Unknown book: {book_name}")
     
     print(f"   ✓ {topic_name.title()}")
 
@@ -0,0 +1,79 @@
+import asyncio
+import random
+import time
+from collections import deque
+
+from telegram.error import Forbidden, RetryAfter, TimedOut
+
+from broadcast import Broadcaster
+
+SUBSCRIBERS = 200
+LATENCY = (0.05, 0.15)
+FLOOD_LIMIT = 30
+BLOCKED_EVERY = 40
+TIMEOUT_RATE = 0.02
+
+
+class FakeBot:
+    """Stands in for the Bot API: slow replies, flood control, blocked users, timeouts."""
+
+    def __init__(self, seed=1):
+        self.rng = random.Random(seed)
+        self.recent = deque()
+        self.last_by_chat = {}
+        self.delivered = {}
+        self.flood_errors = 0
+
+    async def send_message(self, chat_id, text, **kwargs):
+        now = time.monotonic()
+        while self.recent and now - self.recent[0] >= 1:
+            self.recent.popleft()
+        if len(self.recent) >= FLOOD_LIMIT or now - self.last_by_chat.get(chat_id, -1) < 1:
+            self.flood_errors += 1
+            raise RetryAfter(1)
+        self.recent.append(now)
+        self.last_by_chat[chat_id] = now
+        await asyncio.sleep(self.rng.uniform(*LATENCY))
+        if chat_id % BLOCKED_EVERY == 0:
+            raise Forbidden("Forbidden: bot was blocked by the user")
+        if self.rng.random() < TIMEOUT_RATE:
+            raise TimedOut()
+        self.delivered[chat_id] = self.delivered.get(chat_id, 0) + 1
+
+
+async def serial_send(bot, messages):
+    # The old daily loop: one awaited send after another, errors logged and skipped.
+    start = time.monotonic()
+    for chat_id, text in messages:
+        try:
+            await bot.send_message(chat_id=chat_id, text=text)
+        except Exception:
+            pass
+    return time.monotonic() - start
+
+
+async def main():
+    messages = [(chat_id, "🌅 Daily Verse") for chat_id in range(1, SUBSCRIBERS + 1)]
+    reachable = {chat_id for chat_id, _ in messages if chat_id % BLOCKED_EVERY}
+
+    print(f"⏱️ Broadcasting to {SUBSCRIBERS} fake subscribers...")
+    serial_bot = FakeBot()
+    serial_seconds = await serial_send(serial_bot, messages)
+    print(f"   Serial loop:  {len(serial_bot.delivered)} delivered in {serial_seconds:.1f}s")
+
+    bot = FakeBot()
+    stats = await Broadcaster(bot).broadcast(messages)
+    print(f"   Broadcaster:  {stats.summary()}")
+    print(f"   Flood control hits: {bot.flood_errors}")
+
+    duplicates = [chat_id for chat_id, count in bot.delivered.items() if count > 1]
+    missing = reachable - set(bot.delivered)
+    ok = not duplicates and not missing and stats.unreachable == SUBSCRIBERS - len(reachable)
+    print("")
+    if not ok:
+        print(f"❌ {len(missing)} missing, {len(duplicates)} duplicated, {stats.unreachable} unreachable")
+        raise SystemExit(1)
+    print("✅ Every reachable subscriber got exactly one message")
+
+
+asyncio.run(main())
@@ -0,0 +1,49 @@
+import time
+from search_engine import FtsSearchEngine, InvertedIndexEngine
+
+# Frequent words plus a few rare ones; LIKE only stops early when matches are dense.
+KEYWORDS = ["love", "faith", "hope", "peace", "lord", "grace", "shepherd", "forgiveness", "everlasting life"]
+RUNS = 20
+
+engine = FtsSearchEngine()
+
+
+def time_search(search_fn, keyword):
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        search_fn(keyword, 5)
+    return (time.perf_counter() - start) / RUNS * 1000
+
+
+print("⏱️ Benchmarking LIKE vs FTS5 vs in-memory index search...")
+
+if not engine.has_fts:
+    print("❌ verses_fts table not found. Run import_bible.py first.")
+    raise SystemExit(1)
+
+print("   Loading in-memory index...")
+load_start = time.perf_counter()
+memory_engine = InvertedIndexEngine()
+print(f"   ✓ Loaded in {time.perf_counter() - load_start:.2f}s")
+
+print("")
+print("=" * 58)
+print(f"{'Keyword':<20}{'LIKE (ms)':>12}{'FTS5 (ms)':>12}{'Memory (ms)':>14}")
+print("=" * 58)
+
+total_like = 0
+total_fts = 0
+total_memory = 0
+for keyword in KEYWORDS:
+    like_ms = time_search(engine.like_search, keyword)
+    fts_ms = time_search(engine.search, keyword)
+    memory_ms = time_search(memory_engine.search, keyword)
+    total_like += like_ms
+    total_fts += fts_ms
+    total_memory += memory_ms
+    print(f"{keyword:<20}{like_ms:>12.3f}{fts_ms:>12.3f}{memory_ms:>14.3f}")
+
+count = len(KEYWORDS)
+print("=" * 58)
+print(f"{'Average':<20}{total_like / count:>12.3f}{total_fts / count:>12.3f}{total_memory / count:>14.3f}")
+print("=" * 58)
@@ -1,52 +1,45 @@
-import sqlite3
+from book_resolver import get_book_resolver
+from database import get_database
+from search_engine import SEARCH_BACKEND, create_search_engine
 
 class BibleBot:
     
     def __init__(self):
         self.db_path = 'bible.db'
+        self.db = get_database(self.db_path)
+        self.engine = create_search_engine(SEARCH_BACKEND, self.db_path)
     
     def search(self, keyword, limit=5):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        query = '''
-            SELECT b.book_name, v.chapter, v.verse, v.text
-            FROM verses v
-            JOIN books b ON v.book_id = b.book_id
-            WHERE v.text LIKE ?
-            LIMIT ?
-        '''
-        
-        cursor.execute(query, (f'%{keyword}%', limit))
-        results = cursor.fetchall()
-        conn.close()
-        
-        return results
+        return self.engine.search(keyword, limit)
     
     def get_verse(self, book_name, chapter, verse):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        resolver = get_book_resolver(self.db_path)
+        book_id = resolver.resolve(book_name)
+        if book_id is None:
+            return None
         
         query = '''
-            SELECT b.book_name, v.chapter, v.verse, v.text
+            SELECT v.chapter, v.verse, v.text
             FROM verses v
-            JOIN books b ON v.book_id = b.book_id
-            WHERE b.book_name LIKE ? AND v.chapter = ? AND v.verse = ?
+            WHERE v.book_id = ? AND v.chapter = ? AND v.verse = ?
         '''
         
-        cursor.execute(query, (f'%{book_name}%', chapter, verse))
-        result = cursor.fetchone()
-        conn.close()
+        result = self.db.fetchone(query, (book_id, chapter, verse))
         
-        return result
+        return (resolver.book_name(book_id),) + result if result else None
     
     def respond(self, user_input):
-        results = self.search(user_input)
+        results, suggestion = self.engine.search_with_suggestion(user_input)
         
         if not results:
             return f"❌ No verses found for '{user_input}'. Try a different word!"
         
-        response = f"\n📖 Found {len(results)} verse(s) for '{user_input}':\n"
+        response = ""
+        if suggestion:
+            response += f"\n🤔 Did you mean '{suggestion}'?"
+            user_input = suggestion
+        
+        response += f"\n📖 Found {len(results)} verse(s) for '{user_input}':\n"
         response += "=" * 45 + "\n"
         
         for book, chapter, verse, text in results:
@@ -66,6 +59,7 @@ if __name__ == "__main__":
     print("🙏 BIBLE BOT - Ready to help!")
     print("=" * 50)
     print("Type any word to search the Bible")
+    print("Use \"quotes\" for phrases, AND/OR/NOT, book:Romans, ot: or nt:")
     print("Type 'quit' to exit")
     print("=" * 50)
     
@@ -0,0 +1,175 @@
+import re
+import threading
+
+from database import get_database
+
+
+# Common abbreviations, keyed by the book names used in bible.db.
+BOOK_ALIASES = {
+    "Genesis": ["gen", "ge", "gn"],
+    "Exodus": ["exod", "exo", "ex"],
+    "Leviticus": ["lev", "le", "lv"],
+    "Numbers": ["num", "nu", "nm", "nb"],
+    "Deuteronomy": ["deut", "deu", "dt"],
+    "Joshua": ["josh", "jos", "jsh"],
+    "Judges": ["judg", "jdg", "jg", "jdgs"],
+    "Ruth": ["rth", "ru"],
+    "1 Samuel": ["1 sam", "1 sa", "1 sm", "1 s"],
+    "2 Samuel": ["2 sam", "2 sa", "2 sm", "2 s"],
+    "1 Kings": ["1 kgs", "1 ki", "1 kg"],
+    "2 Kings": ["2 kgs", "2 ki", "2 kg"],
+    "1 Chronicles": ["1 chron", "1 chr", "1 ch"],
+    "2 Chronicles": ["2 chron", "2 chr", "2 ch"],
+    "Ezra": ["ezr"],
+    "Nehemiah": ["neh", "ne"],
+    "Esther": ["esth", "est", "es"],
+    "Job": ["jb"],
+    "Psalms": ["psalm", "pslm", "psa", "psm", "pss", "ps"],
+    "Proverbs": ["prov", "pro", "prv", "pr"],
+    "Ecclesiastes": ["eccles", "eccle", "ecc", "ec", "qoh"],
+    "Song of Solomon": ["song of songs", "song", "sos", "so", "canticles", "cant"],
+    "Isaiah": ["isa", "is"],
+    "Jeremiah": ["jer", "je", "jr"],
+    "Lamentations": ["lam", "la"],
+    "Ezekiel": ["ezek", "eze", "ezk"],
+    "Daniel": ["dan", "da", "dn"],
+    "Hosea": ["hos", "ho"],
+    "Joel": ["jl"],
+    "Amos": ["am"],
+    "Obadiah": ["obad", "ob"],
+    "Jonah": ["jnh", "jon"],
+    "Micah": ["mic", "mc"],
+    "Nahum": ["nah", "na"],
+    "Habakkuk": ["hab", "hb"],
+    "Zephaniah": ["zeph", "zep", "zp"],
+    "Haggai": ["hag", "hg"],
+    "Zechariah": ["zech", "zec", "zc"],
+    "Malachi": ["mal", "ml"],
+    "Matthew": ["matt", "mat", "mt"],
+    "Mark": ["mrk", "mar", "mk", "mr"],
+    "Luke": ["luk", "lk"],
+    "John": ["joh", "jhn", "jn"],
+    "Acts": ["act", "ac"],
+    "Romans": ["rom", "ro", "rm"],
+    "1 Corinthians": ["1 cor", "1 co"],
+    "2 Corinthians": ["2 cor", "2 co"],
+    "Galatians": ["gal", "ga"],
+    "Ephesians": ["eph", "ephes"],
+    "Philippians": ["phil", "php", "pp"],
+    "Colossians": ["col", "co"],
+    "1 Thessalonians": ["1 thess", "1 thes", "1 th"],
+    "2 Thessalonians": ["2 thess", "2 thes", "2 th"],
+    "1 Timothy": ["1 tim", "1 ti"],
+    "2 Timothy": ["2 tim", "2 ti"],
+    "Titus": ["tit", "ti"],
+    "Philemon": ["philem", "phm", "pm"],
+    "Hebrews": ["heb"],
+    "James": ["jas", "jm"],
+    "1 Peter": ["1 pet", "1 pe", "1 pt", "1 p"],
+    "2 Peter": ["2 pet", "2 pe", "2 pt", "2 p"],
+    "1 John": ["1 jn", "1 jhn", "1 jo", "1 j"],
+    "2 John": ["2 jn", "2 jhn", "2 jo", "2 j"],
+    "3 John": ["3 jn", "3 jhn", "3 jo", "3 j"],
+    "Jude": ["jud", "jd"],
+    "Revelation": ["revelations", "rev", "re", "rv"],
+}
+
+ORDINAL_PREFIXES = {
+    "first": "1", "1st": "1", "i": "1",
+    "second": "2", "2nd": "2", "ii": "2",
+    "third": "3", "3rd": "3", "iii": "3",
+}
+
+SEPARATOR_PATTERN = re.compile(r"[\s.]+")
+
+AMBIGUOUS = -1
+
+
+def book_key(name):
+    # "1 Cor.", "1Cor", "I Corinthians" and "first corinthians" share a key.
+    words = SEPARATOR_PATTERN.split(name.strip().casefold())
+    if len(words) > 1 and words[0] in ORDINAL_PREFIXES:
+        words[0] = ORDINAL_PREFIXES[words[0]]
+    return "".join(words)
+
+
+class _TrieNode:
+
+    __slots__ = ("children", "book_id", "only_book")
+
+    def __init__(self):
+        self.children = {}
+        self.book_id = None
+        # The single book every name below this node belongs to, or AMBIGUOUS.
+        self.only_book = None
+
+
+class BookResolver:
+
+    def __init__(self, books):
+        self.names = {}
+        self.root = _TrieNode()
+        for book_id, book_name in books:
+            self.names[book_id] = book_name
+            self._insert(book_key(book_name), book_id)
+            for alias in BOOK_ALIASES.get(book_name, []):
+                self._insert(book_key(alias), book_id)
+
+    @classmethod
+    def from_database(cls, db_path):
+        books = get_database(db_path).fetchall("SELECT book_id, book_name FROM books ORDER BY book_id")
+        return cls(books)
+
+    def _insert(self, key, book_id):
+        node = self.root
+        self._mark(node, book_id)
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            self._mark(node, book_id)
+        # A full name wins over an alias of another book ("Job" vs "jb").
+        if node.book_id is None:
+            node.book_id = book_id
+
+    @staticmethod
+    def _mark(node, book_id):
+        if node.only_book is None:
+            node.only_book = book_id
+        elif node.only_book != book_id:
+            node.only_book = AMBIGUOUS
+
+    def resolve(self, name):
+        # Exact names and aliases first, then any prefix that only one book
+        # starts with ("Psalm" -> Psalms, "Philip" -> Philippians).
+        node = self.root
+        key = book_key(name)
+        if not key:
+            return None
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        if node.book_id is not None:
+            return node.book_id
+        if node.only_book not in (None, AMBIGUOUS):
+            return node.only_book
+        return None
+
+    def book_name(self, book_id):
+        return self.names.get(book_id)
+
+
+_resolvers = {}
+_resolvers_lock = threading.Lock()
+
+
+def get_book_resolver(db_path):
+    with _resolvers_lock:
+        resolver = _resolvers.get(db_path)
+        if resolver is None:
+            resolver = _resolvers[db_path] = BookResolver.from_database(db_path)
+        return resolver
+
+
+def reset_book_resolvers():
+    with _resolvers_lock:
+        _resolvers.clear()
@@ -0,0 +1,185 @@
+import asyncio
+import inspect
+import random
+import time
+from collections import OrderedDict
+
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TelegramError
+
+
+# Telegram allows about 30 messages/second overall and 1/second to the same chat.
+DEFAULT_RATE = 25
+# Any one-second window sees at most burst + rate sends.
+DEFAULT_BURST = 5
+DEFAULT_CONCURRENCY = 20
+PER_CHAT_INTERVAL = 1.0
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0
+LATENCY_SAMPLE_SIZE = 10000
+
+
+class TokenBucket:
+
+    def __init__(self, rate, capacity=DEFAULT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0
+        self.lock = asyncio.Lock()
+
+    def pause(self, seconds):
+        # Flood control is account-wide, so one RetryAfter holds back every sender.
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class BroadcastStats:
+
+    def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.unreachable = 0
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+        # Reservoir sample, so percentiles stay cheap on any audience size.
+        self.latencies = []
+        self.latency_count = 0
+        self.rng = random.Random()
+
+    def record_latency(self, seconds):
+        self.latency_count += 1
+        if len(self.latencies) < LATENCY_SAMPLE_SIZE:
+            self.latencies.append(seconds)
+            return
+        slot = self.rng.randrange(self.latency_count)
+        if slot < LATENCY_SAMPLE_SIZE:
+            self.latencies[slot] = seconds
+
+    def percentile(self, fraction):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def throughput(self):
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return (
+            f"{self.sent} sent, {self.failed} failed, {self.unreachable} unreachable, "
+            f"{self.retries} retries in {self.elapsed:.1f}s ({self.throughput():.1f} msg/s, "
+            f"p50 {self.percentile(0.5) * 1000:.0f}ms, p95 {self.percentile(0.95) * 1000:.0f}ms)"
+        )
+
+
+def _retry_seconds(error):
+    retry_after = error.retry_after
+    return retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else float(retry_after)
+
+
+class Broadcaster:
+
+    def __init__(self, bot, rate=DEFAULT_RATE, concurrency=DEFAULT_CONCURRENCY,
+                 per_chat_interval=PER_CHAT_INTERVAL, max_retries=MAX_RETRIES):
+        self.bot = bot
+        self.bucket = TokenBucket(rate)
+        self.concurrency = concurrency
+        self.per_chat_interval = per_chat_interval
+        self.max_retries = max_retries
+        # chat_id -> last send, oldest first; entries older than the interval are dropped.
+        self.last_sent = OrderedDict()
+
+    async def _wait_for_chat(self, chat_id):
+        now = time.monotonic()
+        while self.last_sent:
+            oldest_chat, sent_at = next(iter(self.last_sent.items()))
+            if now - sent_at < self.per_chat_interval:
+                break
+            del self.last_sent[oldest_chat]
+        sent_at = self.last_sent.get(chat_id)
+        if sent_at is not None:
+            await asyncio.sleep(self.per_chat_interval - (now - sent_at))
+        self.last_sent[chat_id] = time.monotonic()
+        self.last_sent.move_to_end(chat_id)
+
+    async def send(self, chat_id, text, stats, **kwargs):
+        # Returns "sent", "failed" (worth retrying later) or "unreachable" (blocked, chat gone).
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            await self._wait_for_chat(chat_id)
+            started = time.monotonic()
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=text, **kwargs)
+            except RetryAfter as e:
+                self.bucket.pause(_retry_seconds(e))
+            except Forbidden:
+                stats.unreachable += 1
+                return "unreachable"
+            except BadRequest as e:
+                if "chat not found" in str(e).lower():
+                    stats.unreachable += 1
+                    return "unreachable"
+                print(f"  ❌ Error for {chat_id}: {e}", flush=True)
+                stats.failed += 1
+                return "failed"
+            except NetworkError:
+                await asyncio.sleep(BACKOFF_BASE * 2 ** attempt)
+            except TelegramError as e:
+                print(f"  ❌ Error for {chat_id}: {e}", flush=True)
+                stats.failed += 1
+                return "failed"
+            else:
+                stats.record_latency(time.monotonic() - started)
+                stats.sent += 1
+                return "sent"
+            if attempt < self.max_retries:
+                stats.retries += 1
+        print(f"  ❌ Gave up on {chat_id} after {self.max_retries} retries", flush=True)
+        stats.failed += 1
+        return "failed"
+
+    async def broadcast(self, messages, on_result=None, **kwargs):
+        # messages yields (chat_id, text, ...) tuples; each is handed back to
+        # on_result(item, outcome) when done, awaited if it is a coroutine function.
+        # A small bounded queue keeps memory flat.
+        stats = BroadcastStats()
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                outcome = await self.send(item[0], item[1], stats, **kwargs)
+                if on_result:
+                    result = on_result(item, outcome)
+                    if inspect.isawaitable(result):
+                        await result
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            for item in messages:
+                await queue.put(item)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+        stats.elapsed = time.monotonic() - stats.started
+        return stats
@@ -1,4 +1,7 @@
 import sqlite3
+from search_engine import create_fts_table
+from spelling import create_spelling_tables
+from migrations import run_migrations
 
 print("🔨 Creating database...")
 
@@ -22,12 +25,30 @@ cursor.execute('''
         chapter INTEGER,
         verse INTEGER,
         text TEXT,
+        tokens TEXT,
         FOREIGN KEY (book_id) REFERENCES books(book_id)
     )
 ''')
 
+print("   Creating metadata table...")
+cursor.execute('''
+    CREATE TABLE IF NOT EXISTS metadata (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+''')
+
+print("   Creating full-text search index...")
+create_fts_table(cursor)
+
+print("   Creating spelling index tables...")
+create_spelling_tables(cursor)
+
 conn.commit()
 conn.close()
 
+print("   Applying schema migrations...")
+run_migrations('bible.db')
+
 print("✅ Database created successfully!")
 print("📁 File saved as: bible.db")
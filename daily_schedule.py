@@ -0,0 +1,43 @@
+from datetime import datetime, time as dtime, timedelta
+
+import pytz
+
+
+DAILY_SEND_HOUR = 6
+
+
+def get_timezone(timezone_name):
+    try:
+        return pytz.timezone(timezone_name or 'UTC')
+    except pytz.UnknownTimeZoneError:
+        return pytz.UTC
+
+
+def local_date(timezone_name, moment):
+    return moment.astimezone(get_timezone(timezone_name)).date()
+
+
+def next_send_time(timezone_name, after, hour=DAILY_SEND_HOUR):
+    # First local `hour`:00 strictly after `after` (an aware datetime), in UTC.
+    # Each day is localized on its own, so the wall-clock hour holds across DST
+    # changes; a send hour skipped by a spring-forward gap moves to the hour after.
+    tz = get_timezone(timezone_name)
+    day = after.astimezone(tz).date()
+    while True:
+        candidate = tz.normalize(tz.localize(datetime.combine(day, dtime(hour))))
+        if candidate > after:
+            return candidate.astimezone(pytz.UTC)
+        day += timedelta(days=1)
+
+
+def next_send_timestamp(timezone_name, after, hour=DAILY_SEND_HOUR):
+    return int(next_send_time(timezone_name, after, hour).timestamp())
+
+
+def backfill_next_send(cursor, now=None):
+    now = now or datetime.now(pytz.UTC)
+    cursor.execute("SELECT chat_id, timezone FROM subscribers WHERE next_send_at IS NULL")
+    cursor.executemany(
+        "UPDATE subscribers SET next_send_at = ? WHERE chat_id = ?",
+        [(next_send_timestamp(timezone_name, now), chat_id) for chat_id, timezone_name in cursor.fetchall()]
+    )
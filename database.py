@@ -0,0 +1,253 @@
+import asyncio
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+DB_PATH = "bible.db"
+READ_POOL_SIZE = int(os.environ.get("DB_READ_POOL_SIZE", 4))
+STATEMENT_CACHE_SIZE = 256
+BUSY_TIMEOUT_MS = 5000
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 50))
+# Threads behind the awaitable variants; one per reader keeps them from queueing on the pool.
+DB_WORKERS = int(os.environ.get("DB_WORKERS", READ_POOL_SIZE))
+
+
+def _statement_key(sql):
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+class QueryStats:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = {}
+
+    def record(self, sql, seconds):
+        key = _statement_key(sql)
+        with self.lock:
+            count, total, slowest = self.queries.get(key, (0, 0.0, 0.0))
+            self.queries[key] = (count + 1, total + seconds, max(slowest, seconds))
+        if seconds * 1000 >= SLOW_QUERY_MS:
+            print(f"🐢 Slow query ({seconds * 1000:.0f}ms): {key[:120]}", flush=True)
+
+    def top(self, n=10):
+        # (statement, count, total ms, mean ms, max ms), most total time first.
+        with self.lock:
+            rows = [
+                (key, count, total * 1000, total / count * 1000, slowest * 1000)
+                for key, (count, total, slowest) in self.queries.items()
+            ]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows[:n]
+
+    def summary(self, n=5):
+        lines = [
+            f"{count:>6}x {mean:>7.2f}ms avg {slowest:>7.2f}ms max  {key[:70]}"
+            for key, count, total, mean, slowest in self.top(n)
+        ]
+        return "\n".join(lines)
+
+
+class PoolStats:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.max_queued = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def submitted(self):
+        with self.lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+
+    def started(self, waited):
+        with self.lock:
+            self.queued -= 1
+            self.running += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def finished(self):
+        with self.lock:
+            self.running -= 1
+            self.completed += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "queued": self.queued,
+                "running": self.running,
+                "max_queued": self.max_queued,
+                "completed": self.completed,
+                "mean_wait_ms": self.total_wait / self.completed * 1000 if self.completed else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+    def summary(self):
+        stats = self.snapshot()
+        return (
+            f"{stats['completed']} calls, queue {stats['queued']} (max {stats['max_queued']}), "
+            f"{stats['running']} running, wait {stats['mean_wait_ms']:.2f}ms avg {stats['max_wait_ms']:.2f}ms max"
+        )
+
+
+class Database:
+    """Long-lived connections: a pool of read-only readers and one serialized writer."""
+
+    def __init__(self, db_path=DB_PATH, read_pool_size=READ_POOL_SIZE):
+        self.db_path = db_path
+        self.read_pool_size = read_pool_size
+        self.readers = queue.LifoQueue()
+        self.reader_count = 0
+        self.pool_lock = threading.Lock()
+        self.write_lock = threading.RLock()
+        self.writer = None
+        self.stats = QueryStats()
+        self.executor = None
+        self.pool_stats = PoolStats()
+
+    def _connect(self, readonly):
+        if readonly:
+            conn = sqlite3.connect(
+                f"file:{self.db_path}?mode=ro", uri=True,
+                check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE
+            )
+        else:
+            conn = sqlite3.connect(
+                self.db_path, isolation_level=None,
+                check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE
+            )
+            # WAL lets readers keep going while the writer commits.
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        return conn
+
+    def _writer(self):
+        if self.writer is None:
+            self.writer = self._connect(readonly=False)
+        return self.writer
+
+    @contextmanager
+    def reader(self):
+        try:
+            conn = self.readers.get_nowait()
+        except queue.Empty:
+            with self.pool_lock:
+                create = self.reader_count < self.read_pool_size
+                if create:
+                    self.reader_count += 1
+            if create:
+                # The writer switches the file to WAL before any reader opens it.
+                with self.write_lock:
+                    self._writer()
+                conn = self._connect(readonly=True)
+            else:
+                conn = self.readers.get()
+        try:
+            yield conn
+        finally:
+            self.readers.put(conn)
+
+    @contextmanager
+    def transaction(self):
+        with self.write_lock:
+            conn = self._writer()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def fetchall(self, sql, params=()):
+        with self.reader() as conn:
+            start = time.perf_counter()
+            rows = conn.execute(sql, params).fetchall()
+        self.stats.record(sql, time.perf_counter() - start)
+        return rows
+
+    def fetchone(self, sql, params=()):
+        with self.reader() as conn:
+            start = time.perf_counter()
+            row = conn.execute(sql, params).fetchone()
+        self.stats.record(sql, time.perf_counter() - start)
+        return row
+
+    def execute(self, sql, params=()):
+        # One write in its own transaction; returns the affected row count.
+        start = time.perf_counter()
+        with self.transaction() as conn:
+            rowcount = conn.execute(sql, params).rowcount
+        self.stats.record(sql, time.perf_counter() - start)
+        return rowcount
+
+    def executemany(self, sql, seq_of_params):
+        start = time.perf_counter()
+        with self.transaction() as conn:
+            rowcount = conn.executemany(sql, seq_of_params).rowcount
+        self.stats.record(sql, time.perf_counter() - start)
+        return rowcount
+
+    async def run(self, func, *args):
+        # Runs func(*args) on the bounded database threads, so a slow query
+        # holds up its own caller instead of the event loop.
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="db")
+        submitted = time.perf_counter()
+        self.pool_stats.submitted()
+
+        def call():
+            self.pool_stats.started(time.perf_counter() - submitted)
+            try:
+                return func(*args)
+            finally:
+                self.pool_stats.finished()
+
+        return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        with self.pool_lock:
+            while True:
+                try:
+                    self.readers.get_nowait().close()
+                except queue.Empty:
+                    break
+            self.reader_count = 0
+        with self.write_lock:
+            if self.writer is not None:
+                self.writer.close()
+                self.writer = None
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(db_path=DB_PATH):
+    with _databases_lock:
+        database = _databases.get(db_path)
+        if database is None:
+            database = _databases[db_path] = Database(db_path)
+        return database
+
+
+def close_databases():
+    with _databases_lock:
+        for database in _databases.values():
+            database.close()
+        _databases.clear()
@@ -0,0 +1,129 @@
+from database import get_database
+
+
+DB_PATH = "bible.db"
+DELIVERY_BATCH_SIZE = 100
+MAX_DELIVERY_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 60
+# Pending rows older than this are dropped: a morning verse is not worth sending at night.
+DELIVERY_EXPIRY = 6 * 3600
+# A claimed row goes back to pending if its run has not recorded an outcome by then.
+DELIVERY_LEASE = 600
+
+
+def create_deliveries_table(cursor):
+    # One row per subscriber per local day: pending -> sending -> sent | unreachable | failed | expired.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS deliveries (
+            chat_id INTEGER NOT NULL,
+            local_date TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at INTEGER NOT NULL,
+            created_at INTEGER NOT NULL,
+            sent_at INTEGER,
+            lease_until INTEGER,
+            PRIMARY KEY (chat_id, local_date)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_deliveries_pending ON deliveries(next_attempt_at) WHERE status = 'pending'"
+    )
+    add_delivery_leases(cursor)
+
+
+def add_delivery_leases(cursor):
+    cursor.execute("PRAGMA table_info(deliveries)")
+    if "lease_until" not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE deliveries ADD COLUMN lease_until INTEGER")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_deliveries_sending ON deliveries(lease_until) WHERE status = 'sending'"
+    )
+
+
+class DeliveryLedger:
+
+    def __init__(self, db_path=DB_PATH, batch_size=DELIVERY_BATCH_SIZE):
+        self.db_path = db_path
+        self.db = get_database(db_path)
+        self.batch_size = batch_size
+        self.results = []
+
+    def enqueue(self, deliveries, schedule_updates, now_ts):
+        # deliveries: (chat_id, local_date); schedule_updates: (next_send_at, chat_id).
+        # Both commit together, so a restart can neither lose nor repeat a day.
+        with self.db.transaction() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO deliveries (chat_id, local_date, next_attempt_at, created_at) VALUES (?, ?, ?, ?)",
+                [(chat_id, local_date, now_ts, now_ts) for chat_id, local_date in deliveries]
+            )
+            conn.executemany("UPDATE subscribers SET next_send_at = ? WHERE chat_id = ?", schedule_updates)
+
+    def pending(self, now_ts, limit):
+        # Claims up to limit due rows in one transaction, so overlapping runs never send the same row.
+        with self.db.transaction() as conn:
+            # Leases left behind by a run that stopped mid-send.
+            conn.execute(
+                "UPDATE deliveries SET status = 'pending' WHERE status = 'sending' AND lease_until <= ?",
+                (now_ts,)
+            )
+            conn.execute(
+                "UPDATE deliveries SET status = 'expired' WHERE status = 'pending' AND next_attempt_at <= ? AND created_at < ?",
+                (now_ts, now_ts - DELIVERY_EXPIRY)
+            )
+            return conn.execute('''
+                UPDATE deliveries SET status = 'sending', lease_until = ?
+                WHERE (chat_id, local_date) IN (
+                    SELECT chat_id, local_date FROM deliveries
+                    WHERE status = 'pending' AND next_attempt_at <= ?
+                    ORDER BY next_attempt_at
+                    LIMIT ?
+                )
+                RETURNING chat_id, local_date, attempts
+            ''', (now_ts + DELIVERY_LEASE, now_ts, limit)).fetchall()
+
+    def next_attempt_at(self):
+        # Claimed rows only count again once their lease runs out.
+        return self.db.fetchone('''
+            SELECT MIN(due) FROM (
+                SELECT MIN(next_attempt_at) AS due FROM deliveries WHERE status = 'pending'
+                UNION ALL
+                SELECT MIN(lease_until) FROM deliveries WHERE status = 'sending'
+            )
+        ''')[0]
+
+    def record(self, chat_id, local_date, attempts, outcome, now_ts):
+        # Only buffered, so it is safe on the event loop; returns True once a batch is due.
+        # write(take()) before reading the ledger back.
+        attempts += 1
+        sent_at = None
+        next_attempt_at = now_ts
+        if outcome == "sent":
+            status = "sent"
+            sent_at = now_ts
+        elif outcome == "failed" and attempts < MAX_DELIVERY_ATTEMPTS:
+            status = "pending"
+            next_attempt_at = now_ts + RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+        else:
+            status = outcome
+        self.results.append((status, attempts, next_attempt_at, sent_at, chat_id, local_date))
+        return len(self.results) >= self.batch_size
+
+    def take(self):
+        results, self.results = self.results, []
+        return results
+
+    def write(self, results):
+        if not results:
+            return
+        self.db.executemany('''
+            UPDATE deliveries SET status = ?, attempts = ?, next_attempt_at = ?, sent_at = ?, lease_until = NULL
+            WHERE chat_id = ? AND local_date = ?
+        ''', results)
+
+    def was_delivered(self, chat_id, local_date):
+        result = self.db.fetchone(
+            "SELECT 1 FROM deliveries WHERE chat_id = ? AND local_date = ? AND status = 'sent'",
+            (chat_id, local_date)
+        )
+        return result is not None
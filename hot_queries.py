@@ -0,0 +1,82 @@
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+
+PAGE_CACHE_CHUNK = 1024 * 1024
+
+
+class HotQueryRecorder:
+
+    def __init__(self, path, max_tracked=5000):
+        self.path = path
+        self.max_tracked = max_tracked
+        self.counts = Counter()
+        self.lock = threading.Lock()
+
+    def record(self, kind, *args):
+        with self.lock:
+            self.counts[(kind,) + args] += 1
+            if len(self.counts) > self.max_tracked:
+                # Keep the busiest half so memory stays bounded.
+                self.counts = Counter(dict(self.counts.most_common(self.max_tracked // 2)))
+
+    def top(self, limit):
+        with self.lock:
+            return [(key[0], key[1:]) for key, _ in self.counts.most_common(limit)]
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read {self.path}: {e}", flush=True)
+            return 0
+        with self.lock:
+            for entry in entries:
+                self.counts[(entry['kind'],) + tuple(entry['args'])] += entry['count']
+        return len(entries)
+
+    def save(self, limit=500):
+        with self.lock:
+            entries = [
+                {"kind": key[0], "args": list(key[1:]), "count": count}
+                for key, count in self.counts.most_common(limit)
+            ]
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f)
+        os.replace(temp_path, self.path)
+        return len(entries)
+
+
+def warm_page_cache(db_path, deadline):
+    # Reading the file once pulls it into the OS page cache for every later connection.
+    read = 0
+    with open(db_path, 'rb') as f:
+        while time.monotonic() < deadline:
+            chunk = f.read(PAGE_CACHE_CHUNK)
+            if not chunk:
+                break
+            read += len(chunk)
+    return read
+
+
+def warm_caches(queries, loaders, deadline):
+    warmed = 0
+    for kind, args in queries:
+        if time.monotonic() >= deadline:
+            break
+        loader = loaders.get(kind)
+        if loader is None:
+            continue
+        try:
+            loader(*args)
+            warmed += 1
+        except Exception as e:
+            print(f"⚠️ Warm-up failed for {kind} {args}: {e}", flush=True)
+    return warmed
@@ -1,5 +1,11 @@
 import sqlite3
 import json
+from datetime import date, datetime
+from normalizer import normalize_text
+from search_engine import rebuild_fts_index
+from spelling import build_spelling_index, create_spelling_tables
+from scripture_file import write_scripture_file
+from votd_calendar import CALENDAR_DAYS, extend_calendar
 
 print("📚 Starting Bible import...")
 
@@ -9,6 +15,10 @@ cursor = conn.cursor()
 cursor.execute("DELETE FROM verses")
 cursor.execute("DELETE FROM books")
 
+cursor.execute("PRAGMA table_info(verses)")
+if "tokens" not in [row[1] for row in cursor.fetchall()]:
+    cursor.execute("ALTER TABLE verses ADD COLUMN tokens TEXT")
+
 print("   Loading bible.json...")
 with open('bible.json', 'r', encoding='utf-8-sig') as f:
     bible = json.load(f)
@@ -43,13 +53,38 @@ for book_index, book in enumerate(bible, 1):
     for chapter_num, chapter in enumerate(book['chapters'], 1):
         for verse_num, verse_text in enumerate(chapter, 1):
             cursor.execute(
-                "INSERT INTO verses (book_id, chapter, verse, text) VALUES (?, ?, ?, ?)",
-                (book_index, chapter_num, verse_num, verse_text)
+                "INSERT INTO verses (book_id, chapter, verse, text, tokens) VALUES (?, ?, ?, ?, ?)",
+                (book_index, chapter_num, verse_num, verse_text, " ".join(normalize_text(verse_text)))
             )
             total_verses += 1
     
     print(f"   ✓ {book_name}")
 
+print("   Building full-text search index...")
+rebuild_fts_index(cursor)
+
+print("   Building spelling index...")
+create_spelling_tables(cursor)
+vocabulary_size = build_spelling_index(cursor)
+
+print("   Writing memory-mapped scripture file...")
+write_scripture_file(cursor, 'bible.bin')
+
+print("   Extending verse of the day calendar...")
+extend_calendar(cursor, date.today(), CALENDAR_DAYS)
+
+# A new version tells running bots to drop their cached scripture lookups.
+cursor.execute('''
+    CREATE TABLE IF NOT EXISTS metadata (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+''')
+cursor.execute(
+    "INSERT OR REPLACE INTO metadata (key, value) VALUES ('scripture_version', ?)",
+    (datetime.now().isoformat(),)
+)
+
 conn.commit()
 conn.close()
 
@@ -58,4 +93,5 @@ print("=" * 40)
 print("✅ IMPORT COMPLETE!")
 print(f"📖 Books imported: 66")
 print(f"📜 Verses imported: {total_verses}")
+print(f"🔤 Vocabulary words: {vocabulary_size}")
 print("=" * 40)
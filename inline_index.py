@@ -0,0 +1,111 @@
+import heapq
+import re
+from bisect import bisect_left
+from itertools import islice
+
+from book_resolver import BOOK_ALIASES, book_key, get_book_resolver
+from database import get_database
+
+
+INLINE_RESULT_LIMIT = 10
+# Shorter word prefixes match too much of the vocabulary to be worth completing.
+MIN_WORD_PREFIX = 2
+
+# "john 3", "1 cor 13:", "ps 23:1": a book, a chapter and an optional, possibly partial, verse.
+REFERENCE_PATTERN = re.compile(r"^(\d?\s*[^\W\d][^:]*?)\s*(\d+)(?::(\d*))?$")
+LAST_WORD_PATTERN = re.compile(r"\w+$")
+
+
+def prefix_range(keys, prefix):
+    # keys is sorted; returns the slice bounds of every key that starts with prefix.
+    start = bisect_left(keys, prefix)
+    return start, bisect_left(keys, prefix + "\uffff", start)
+
+
+class InlineIndex:
+    """Sorted prefix tables for inline-query autocomplete, built once per scripture import."""
+
+    def __init__(self, resolver, books, chapters, topics, vocabulary):
+        # chapters: book_id -> {chapter: verse count}; vocabulary: (word, frequency) sorted by word.
+        self.resolver = resolver
+        entries = sorted({
+            (book_key(name), book_id)
+            for book_id, book_name in books
+            for name in [book_name] + BOOK_ALIASES.get(book_name, [])
+        })
+        self.book_keys = [key for key, _ in entries]
+        self.book_ids = [book_id for _, book_id in entries]
+        self.chapters = chapters
+        self.topics = sorted(topic.casefold() for topic in topics)
+        self.words = [word for word, _ in vocabulary]
+        self.frequencies = [frequency for _, frequency in vocabulary]
+        self.known = set(self.words)
+
+    @classmethod
+    def from_database(cls, db_path, topics):
+        with get_database(db_path).reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT book_id, book_name FROM books ORDER BY book_id")
+            books = cursor.fetchall()
+            chapters = {}
+            cursor.execute("SELECT book_id, chapter, MAX(verse) FROM verses GROUP BY book_id, chapter")
+            for book_id, chapter, verses in cursor:
+                chapters.setdefault(book_id, {})[chapter] = verses
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'vocabulary'")
+            vocabulary = []
+            if cursor.fetchone() is not None:
+                cursor.execute("SELECT word, frequency FROM vocabulary ORDER BY word")
+                vocabulary = cursor.fetchall()
+        return cls(get_book_resolver(db_path), books, chapters, topics, vocabulary)
+
+    def book_name(self, book_id):
+        return self.resolver.book_name(book_id)
+
+    def books(self, prefix, limit=INLINE_RESULT_LIMIT):
+        # Books whose name or an alias starts with prefix, in canonical order.
+        key = book_key(prefix)
+        if not key:
+            return []
+        start, end = prefix_range(self.book_keys, key)
+        return sorted(set(self.book_ids[start:end]))[:limit]
+
+    def verses(self, book_id, chapter, verse_prefix="", limit=INLINE_RESULT_LIMIT):
+        count = self.chapters.get(book_id, {}).get(chapter, 0)
+        matches = (verse for verse in range(1, count + 1) if str(verse).startswith(verse_prefix))
+        return list(islice(matches, limit))
+
+    def topics_with_prefix(self, prefix, limit=INLINE_RESULT_LIMIT):
+        start, end = prefix_range(self.topics, prefix.casefold())
+        return self.topics[start:min(end, start + limit)]
+
+    def complete_word(self, prefix, limit=1):
+        # The most frequent vocabulary words starting with prefix.
+        if len(prefix) < MIN_WORD_PREFIX:
+            return []
+        start, end = prefix_range(self.words, prefix)
+        best = heapq.nlargest(limit, range(start, end), key=self.frequencies.__getitem__)
+        return [self.words[index] for index in best]
+
+    def suggest(self, text, limit=INLINE_RESULT_LIMIT):
+        # Returns ("verse", book_id, chapter, verse), ("topic", name) and ("search", query)
+        # suggestions for a partly typed inline query, best first.
+        text = " ".join(text.split())
+        if not text:
+            return []
+        match = REFERENCE_PATTERN.match(text)
+        if match:
+            book_id = self.resolver.resolve(match.group(1))
+            if book_id is not None:
+                chapter = int(match.group(2))
+                verses = self.verses(book_id, chapter, match.group(3) or "", limit)
+                return [("verse", book_id, chapter, verse) for verse in verses]
+        suggestions = [("verse", book_id, 1, 1) for book_id in self.books(text, limit)]
+        suggestions += [("topic", topic) for topic in self.topics_with_prefix(text, limit)]
+        # The last word is usually still being typed: search for its likeliest completion.
+        last = LAST_WORD_PATTERN.search(text)
+        if last and last.group(0).casefold() not in self.known:
+            completion = self.complete_word(last.group(0).casefold())
+            if completion:
+                text = text[:last.start()] + completion[0]
+        suggestions.append(("search", text))
+        return suggestions[:limit]
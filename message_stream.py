@@ -0,0 +1,49 @@
+import asyncio
+
+
+# Below Telegram's 4096-character limit, with room for a trailing note.
+MESSAGE_LIMIT = 4000
+# Pause between chunks of one reply; Telegram throttles bursts into a single chat.
+CHUNK_PACING = 0.5
+
+
+def _split_block(block, limit):
+    # Only a block longer than a whole message is split, at the last space that fits.
+    while len(block) > limit:
+        cut = block.rfind(" ", 0, limit)
+        if cut <= 0:
+            cut = limit
+        yield block[:cut]
+        block = block[cut:].lstrip(" ")
+    yield block
+
+
+def pack_messages(blocks, limit=MESSAGE_LIMIT):
+    # Lazily packs rendered blocks into messages of at most `limit` characters.
+    # Messages break between blocks, so the Markdown inside each block stays balanced.
+    current = []
+    size = 0
+    for block in blocks:
+        for piece in _split_block(block, limit):
+            if current and size + len(piece) > limit:
+                message = "".join(current).strip()
+                if message:
+                    yield message
+                current = []
+                size = 0
+            current.append(piece)
+            size += len(piece)
+    message = "".join(current).strip()
+    if message:
+        yield message
+
+
+async def send_chunks(reply, messages, pacing=CHUNK_PACING):
+    # reply(text) is awaited once per message, in order; returns how many were sent.
+    sent = 0
+    for message in messages:
+        if sent:
+            await asyncio.sleep(pacing)
+        await reply(message)
+        sent += 1
+    return sent
@@ -0,0 +1,245 @@
+import sqlite3
+import sys
+from datetime import date
+
+from daily_schedule import backfill_next_send
+from deliveries import add_delivery_leases, create_deliveries_table
+from normalizer import normalize_text
+from search_engine import rebuild_fts_index
+from spelling import build_spelling_index, create_spelling_tables
+from votd_calendar import CALENDAR_DAYS, create_calendar_table, extend_calendar
+
+
+DB_PATH = "bible.db"
+
+
+def _table_exists(cursor, name):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,))
+    return cursor.fetchone() is not None
+
+
+def _column_names(cursor, table):
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in cursor.fetchall()]
+
+
+def add_reference_indexes(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS topics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            topic_name TEXT NOT NULL,
+            book_id INTEGER,
+            chapter INTEGER,
+            verse INTEGER,
+            FOREIGN KEY (book_id) REFERENCES books(book_id)
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_verses_reference ON verses(book_id, chapter, verse)")
+    # Covers both the topic listing and the topic -> verse join.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_topics_name ON topics(topic_name, book_id, chapter, verse)")
+
+
+def add_search_schema(cursor):
+    if "tokens" not in _column_names(cursor, "verses"):
+        cursor.execute("ALTER TABLE verses ADD COLUMN tokens TEXT")
+    cursor.execute("SELECT id, text FROM verses WHERE tokens IS NULL")
+    rows = cursor.fetchall()
+    cursor.executemany(
+        "UPDATE verses SET tokens = ? WHERE id = ?",
+        [(" ".join(normalize_text(text or "")), verse_id) for verse_id, text in rows]
+    )
+    cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'verses_fts'")
+    fts = cursor.fetchone()
+    if rows or fts is None or "tokens" not in fts[0]:
+        rebuild_fts_index(cursor)
+    create_spelling_tables(cursor)
+    cursor.execute("SELECT 1 FROM vocabulary LIMIT 1")
+    if cursor.fetchone() is None:
+        build_spelling_index(cursor)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS metadata (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+
+
+def add_subscribers_table(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS subscribers (
+            chat_id INTEGER PRIMARY KEY,
+            username TEXT,
+            first_name TEXT,
+            subscribed_date TEXT,
+            timezone TEXT DEFAULT 'UTC'
+        )
+    ''')
+
+
+def restem_tokens(cursor):
+    # The stemmer changed, so every normalized token and the index built on them are redone.
+    cursor.execute("SELECT id, text FROM verses")
+    cursor.executemany(
+        "UPDATE verses SET tokens = ? WHERE id = ?",
+        [(" ".join(normalize_text(text or "")), verse_id) for verse_id, text in cursor.fetchall()]
+    )
+    rebuild_fts_index(cursor)
+
+
+def add_votd_calendar(cursor):
+    create_calendar_table(cursor)
+    extend_calendar(cursor, date.today(), CALENDAR_DAYS)
+
+
+def add_next_send_schedule(cursor):
+    if "next_send_at" not in _column_names(cursor, "subscribers"):
+        cursor.execute("ALTER TABLE subscribers ADD COLUMN next_send_at INTEGER")
+    backfill_next_send(cursor)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_subscribers_next_send ON subscribers(next_send_at)")
+
+
+# Append only: a database at user_version N has run the first N migrations.
+MIGRATIONS = [
+    ("reference indexes on verses and topics", add_reference_indexes),
+    ("normalized tokens, full-text and spelling indexes", add_search_schema),
+    ("subscribers table", add_subscribers_table),
+    ("verse of the day calendar", add_votd_calendar),
+    ("per-subscriber next send time", add_next_send_schedule),
+    ("daily delivery ledger", create_deliveries_table),
+    ("delivery claims with leases", add_delivery_leases),
+    ("whole-stem tokens", restem_tokens),
+    ("plural-first stems", restem_tokens),
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def run_migrations(db_path=DB_PATH):
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA user_version")
+    version = cursor.fetchone()[0]
+    for target, (description, migration) in enumerate(MIGRATIONS, 1):
+        if version >= target:
+            continue
+        print(f"   ⬆️ Migrating {db_path} to version {target}: {description}", flush=True)
+        # Each step and its version bump commit together, so a failed step is retried next start.
+        cursor.execute("BEGIN")
+        try:
+            migration(cursor)
+            cursor.execute(f"PRAGMA user_version = {target}")
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            conn.close()
+            raise
+        version = target
+    conn.close()
+    return version
+
+
+# Lookups that must stay on an index; a plain "SCAN <table>" step is a regression.
+QUERY_PLAN_CHECKS = {
+    "verse lookup": (
+        "SELECT v.chapter, v.verse, v.text FROM verses v WHERE v.book_id = ? AND v.chapter = ? AND v.verse = ?",
+        (43, 3, 16),
+    ),
+    "chapter lookup": (
+        "SELECT v.verse, v.text FROM verses v WHERE v.book_id = ? AND v.chapter = ? ORDER BY v.verse",
+        (19, 23),
+    ),
+    "book verse ids": (
+        "SELECT v.id FROM verses v WHERE v.book_id = ? ORDER BY v.chapter, v.verse",
+        (45,),
+    ),
+    "result page": (
+        '''
+        SELECT v.id, b.book_name, v.chapter, v.verse, v.text
+        FROM verses v
+        JOIN books b ON v.book_id = b.book_id
+        WHERE v.id IN (?, ?, ?, ?, ?)
+        ''',
+        (1, 2, 3, 4, 5),
+    ),
+    "topic verses": (
+        '''
+        SELECT b.book_name, t.chapter, t.verse, v.text
+        FROM topics t
+        JOIN books b ON t.book_id = b.book_id
+        JOIN verses v ON t.book_id = v.book_id AND t.chapter = v.chapter AND t.verse = v.verse
+        WHERE t.topic_name = ?
+        LIMIT ?
+        ''',
+        ("love", 5),
+    ),
+    "topic list": ("SELECT DISTINCT topic_name FROM topics ORDER BY topic_name", ()),
+    "verse of the day": (
+        '''
+        SELECT b.book_name, v.chapter, v.verse, v.text
+        FROM votd_calendar c
+        JOIN verses v ON v.book_id = c.book_id AND v.chapter = c.chapter AND v.verse = c.verse
+        JOIN books b ON v.book_id = b.book_id
+        WHERE c.day = ?
+        ''',
+        ("2026-01-01",),
+    ),
+    "subscriber lookup": ("SELECT timezone FROM subscribers WHERE chat_id = ?", (1,)),
+    "due subscriber page": (
+        "SELECT chat_id, timezone, next_send_at FROM subscribers WHERE chat_id > ? AND next_send_at <= ? ORDER BY chat_id LIMIT ?",
+        (0, 0, 500),
+    ),
+    "next due time": ("SELECT MIN(next_send_at) FROM subscribers", ()),
+    "claim pending deliveries": (
+        '''
+        UPDATE deliveries SET status = 'sending', lease_until = ?
+        WHERE (chat_id, local_date) IN (
+            SELECT chat_id, local_date FROM deliveries
+            WHERE status = 'pending' AND next_attempt_at <= ?
+            ORDER BY next_attempt_at
+            LIMIT ?
+        )
+        ''',
+        (0, 0, 1000),
+    ),
+    "expired delivery leases": (
+        "UPDATE deliveries SET status = 'pending' WHERE status = 'sending' AND lease_until <= ?",
+        (0,),
+    ),
+    "delivered today": (
+        "SELECT 1 FROM deliveries WHERE chat_id = ? AND local_date = ? AND status = 'sent'",
+        (1, "2026-01-01"),
+    ),
+}
+
+
+def check_query_plans(db_path=DB_PATH):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    failures = []
+    for name, (query, params) in QUERY_PLAN_CHECKS.items():
+        cursor.execute(f"EXPLAIN QUERY PLAN {query}", params)
+        details = [row[3] for row in cursor.fetchall()]
+        full_scans = [
+            detail for detail in details
+            if detail.startswith("SCAN ") and " USING " not in detail
+        ]
+        if full_scans:
+            failures.append((name, full_scans))
+        status = "❌" if full_scans else "✅"
+        print(f"{status} {name}: {' | '.join(details)}")
+    conn.close()
+    return failures
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    print(f"🔧 Migrating {db_path}...")
+    version = run_migrations(db_path)
+    print(f"✅ Schema version: {version}")
+    print("")
+    print("🧪 Checking query plans...")
+    failures = check_query_plans(db_path)
+    if failures:
+        print(f"❌ {len(failures)} lookup(s) fall back to a full table scan")
+        sys.exit(1)
+    print("✅ All lookups use an index")
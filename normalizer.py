@@ -0,0 +1,73 @@
+import re
+
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Irregular and archaic forms mapped to the modern word they stem with.
+IRREGULAR_FORMS = {
+    "saith": "say", "said": "say", "sayest": "say", "says": "say",
+    "hath": "have", "hast": "have", "has": "have", "had": "have",
+    "doth": "do", "dost": "do", "did": "do", "didst": "do", "doeth": "do",
+    "goeth": "go", "goes": "go", "went": "go",
+    "spake": "speak", "spoke": "speak", "spoken": "speak",
+    "shalt": "shall", "wilt": "will", "canst": "can",
+    "belief": "believe", "unbelief": "unbelieve",
+    "forgave": "forgive", "forgiven": "forgive",
+}
+
+# Optional synonym table, applied after the irregular forms. It is used on
+# both sides of the index, so bible.db must be re-imported after editing it.
+SYNONYMS = {
+    "thee": "thou", "thy": "thou", "thine": "thou",
+    "ye": "you", "your": "you", "yours": "you",
+}
+
+# Words whose endings look like inflections but are part of the word.
+STEM_EXCEPTIONS = {
+    "forest", "harvest", "honest", "interest", "manifest", "request", "priest",
+    "conquest", "modest", "behest", "earnest", "nothing", "something",
+    "anything", "everything", "morning", "evening", "during", "spring",
+    "teeth", "seed", "need", "deed", "feed", "indeed", "jesus", "moses",
+}
+
+SUFFIXES = ("eth", "est", "ness", "ing", "ed")
+# Shorter stems collide with unrelated words ("witness" -> "wit", "string" -> "str").
+MIN_STEM_LENGTH = 4
+
+
+def tokenize(text):
+    return WORD_PATTERN.findall(text.casefold())
+
+
+def stem(word):
+    if word in STEM_EXCEPTIONS:
+        return word
+    # Plurals go first, so "blessings" stems with "blessing" and "goodnesses" with "goodness".
+    if word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")) and len(word) > 3:
+        word = word[:-1]
+        if word in STEM_EXCEPTIONS:
+            return word
+    for suffix in SUFFIXES:
+        if not word.endswith(suffix):
+            continue
+        # "-ed", "-eth" and "-est" count their "e" towards the stem: "loved" is "love" + "d".
+        if len(word) - len(suffix) + suffix.startswith("e") >= MIN_STEM_LENGTH:
+            word = word[:-len(suffix)]
+            break
+    # "love", "loved", "loveth" and "loves" all end up as "lov".
+    if word.endswith("e") and len(word) > 3:
+        word = word[:-1]
+    return word
+
+
+def normalize_token(word):
+    word = word.casefold()
+    word = IRREGULAR_FORMS.get(word, word)
+    word = SYNONYMS.get(word, word)
+    return stem(word)
+
+
+def normalize_text(text):
+    return [normalize_token(word) for word in tokenize(text)]
@@ -0,0 +1,207 @@
+import re
+from collections import namedtuple
+
+from normalizer import normalize_token, tokenize
+
+
+ParsedQuery = namedtuple("ParsedQuery", ["expression", "book", "testament"])
+
+OPERATORS = {"AND", "OR", "NOT"}
+TESTAMENT_FILTERS = {"ot": "Old", "nt": "New"}
+
+QUERY_TOKEN_PATTERN = re.compile(r'(\w+):"([^"]*)"?|"([^"]*)"?|(\()|(\))|([^\s()"]+)')
+
+
+def _lex(text):
+    tokens = []
+    book = None
+    testament = None
+    for match in QUERY_TOKEN_PATTERN.finditer(text):
+        quoted_filter, quoted_value, phrase, open_paren, close_paren, bare = match.groups()
+        if quoted_filter is not None:
+            if quoted_filter.lower() == "book":
+                book = quoted_value.strip() or book
+                continue
+            bare = f"{quoted_filter}:{quoted_value}"
+        if phrase is not None:
+            words = tokenize(phrase)
+            if len(words) == 1:
+                tokens.append(("term", words[0]))
+            elif words:
+                tokens.append(("phrase", tuple(words)))
+        elif open_paren:
+            tokens.append(("(", None))
+        elif close_paren:
+            tokens.append((")", None))
+        elif bare in OPERATORS:
+            tokens.append((bare, None))
+        else:
+            name, separator, value = bare.partition(":")
+            if value and name.lower() == "book":
+                book = value.replace("_", " ")
+                continue
+            if separator and name.lower() in TESTAMENT_FILTERS:
+                testament = TESTAMENT_FILTERS[name.lower()]
+                bare = value
+            for word in tokenize(bare):
+                tokens.append(("term", word))
+    return tokens, book, testament
+
+
+class _Parser:
+    # Recursive descent, loosest to tightest: OR, AND (explicit or implied by
+    # juxtaposition), NOT. Dangling operators and parentheses are ignored
+    # rather than rejected, since the input comes straight from a chat box.
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position][0]
+        return None
+
+    def advance(self):
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def parse(self):
+        nodes = []
+        while self.peek() is not None:
+            node = self.parse_or()
+            if node is not None:
+                nodes.append(node)
+            elif self.peek() is not None:
+                self.advance()
+        return _combine("and", nodes)
+
+    def parse_or(self):
+        nodes = [self.parse_and()]
+        while self.peek() == "OR":
+            self.advance()
+            nodes.append(self.parse_and())
+        return _combine("or", [node for node in nodes if node is not None])
+
+    def parse_and(self):
+        nodes = [self.parse_not()]
+        while self.peek() not in (None, "OR", ")"):
+            if self.peek() == "AND":
+                self.advance()
+            nodes.append(self.parse_not())
+        return _combine("and", [node for node in nodes if node is not None])
+
+    def parse_not(self):
+        kind = self.peek()
+        if kind == "NOT":
+            self.advance()
+            operand = self.parse_not()
+            return ("not", operand) if operand is not None else None
+        if kind == "(":
+            self.advance()
+            node = self.parse_or()
+            if self.peek() == ")":
+                self.advance()
+            return node
+        if kind in ("term", "phrase"):
+            return self.advance()
+        return None
+
+
+def _combine(kind, nodes):
+    if not nodes:
+        return None
+    if len(nodes) == 1:
+        return nodes[0]
+    flattened = []
+    for node in nodes:
+        if node[0] == kind:
+            flattened.extend(node[1])
+        else:
+            flattened.append(node)
+    return (kind, flattened)
+
+
+def parse_query(text):
+    tokens, book, testament = _lex(text)
+    return ParsedQuery(_Parser(tokens).parse(), book, testament)
+
+
+def normalize_query_key(text):
+    # Case-insensitive except for the operators, which only count in upper case.
+    return " ".join(word if word in OPERATORS else word.casefold() for word in text.split())
+
+
+def to_fts_match(node):
+    # Matches against the normalized tokens column, so query words go through
+    # the same normalizer as the index and match whole stems, never prefixes.
+    # FTS5 has no unary NOT, so negations are folded into
+    # "(a AND b) NOT (c OR d)"; a branch made only of negations cannot be
+    # expressed and yields None.
+    kind = node[0]
+    if kind == "term":
+        return f'"{normalize_token(node[1])}"'
+    if kind == "phrase":
+        return '"' + " ".join(normalize_token(word) for word in node[1]) + '"'
+    if kind == "not":
+        return None
+    if kind == "or":
+        parts = [part for part in (to_fts_match(child) for child in node[1]) if part]
+        if not parts:
+            return None
+        return "(" + " OR ".join(parts) + ")"
+    positives = [to_fts_match(child) for child in node[1] if child[0] != "not"]
+    positives = [part for part in positives if part]
+    negatives = [to_fts_match(child[1]) for child in node[1] if child[0] == "not"]
+    negatives = [part for part in negatives if part]
+    if not positives:
+        return None
+    match = "(" + " AND ".join(positives) + ")"
+    if negatives:
+        match += " NOT (" + " OR ".join(negatives) + ")"
+    return match
+
+
+def to_like_sql(node, column="v.text"):
+    kind = node[0]
+    if kind == "term":
+        return f"{column} LIKE ?", [f"%{node[1]}%"]
+    if kind == "phrase":
+        return f"{column} LIKE ?", ["%" + " ".join(node[1]) + "%"]
+    if kind == "not":
+        sql, params = to_like_sql(node[1], column)
+        return f"NOT ({sql})", params
+    parts = []
+    params = []
+    for child in node[1]:
+        child_sql, child_params = to_like_sql(child, column)
+        parts.append(f"({child_sql})")
+        params.extend(child_params)
+    joiner = " AND " if kind == "and" else " OR "
+    return joiner.join(parts), params
+
+
+def query_words(node):
+    kind = node[0]
+    if kind == "term":
+        return [node[1]]
+    if kind == "phrase":
+        return list(node[1])
+    if kind == "not":
+        return query_words(node[1])
+    words = []
+    for child in node[1]:
+        words.extend(query_words(child))
+    return words
+
+
+def replace_words(node, replacements):
+    kind = node[0]
+    if kind == "term":
+        return ("term", replacements.get(node[1], node[1]))
+    if kind == "phrase":
+        return ("phrase", tuple(replacements.get(word, word) for word in node[1]))
+    if kind == "not":
+        return ("not", replace_words(node[1], replacements))
+    return (kind, [replace_words(child, replacements) for child in node[1]])
@@ -0,0 +1,80 @@
+import random
+from array import array
+
+from database import get_database
+
+
+# Pools built from book names, on top of the two testaments.
+BOOK_POOLS = {
+    "wisdom": {"Psalms", "Proverbs"},
+    "psalms": {"Psalms"},
+    "proverbs": {"Proverbs"},
+    "gospels": {"Matthew", "Mark", "Luke", "John"},
+}
+
+TESTAMENT_POOLS = {"ot": "Old", "nt": "New"}
+
+MODES = ["all"] + list(TESTAMENT_POOLS) + list(BOOK_POOLS)
+
+
+class RandomVersePool:
+
+    def __init__(self, db_path):
+        # Its own generator, so picks neither disturb nor depend on the global random state.
+        self.db_path = db_path
+        self.db = get_database(db_path)
+        self.rng = random.Random()
+        self.pools = {}
+        self.topic_pools = {}
+        self._load()
+
+    def _load(self):
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT v.id, b.book_name, b.testament
+                FROM verses v
+                JOIN books b ON v.book_id = b.book_id
+                ORDER BY v.id
+            ''')
+            pools = {mode: array('I') for mode in MODES}
+            for verse_id, book_name, testament in cursor:
+                pools["all"].append(verse_id)
+                for mode, pool_testament in TESTAMENT_POOLS.items():
+                    if testament == pool_testament:
+                        pools[mode].append(verse_id)
+                for mode, book_names in BOOK_POOLS.items():
+                    if book_name in book_names:
+                        pools[mode].append(verse_id)
+            # Every known topic up front, so unknown names never add an entry.
+            cursor.execute('''
+                SELECT t.topic_name, v.id
+                FROM topics t
+                JOIN verses v ON t.book_id = v.book_id AND t.chapter = v.chapter AND t.verse = v.verse
+                ORDER BY t.topic_name, v.id
+            ''')
+            topic_pools = {}
+            for topic_name, verse_id in cursor:
+                topic_pools.setdefault(topic_name, array('I')).append(verse_id)
+        self.pools = pools
+        self.topic_pools = topic_pools
+
+    def choose(self, mode="all", topic=None):
+        pool = self.topic_pools.get(topic) if topic else self.pools.get(mode)
+        if not pool:
+            return None
+        return pool[self.rng.randrange(len(pool))]
+
+    def fetch(self, verse_id):
+        return self.db.fetchone('''
+            SELECT b.book_name, v.chapter, v.verse, v.text
+            FROM verses v
+            JOIN books b ON v.book_id = b.book_id
+            WHERE v.id = ?
+        ''', (verse_id,))
+
+    def random_verse(self, mode="all", topic=None):
+        verse_id = self.choose(mode, topic)
+        if verse_id is None:
+            return None
+        return self.fetch(verse_id)
@@ -0,0 +1,142 @@
+import re
+from collections import namedtuple
+
+
+ReferenceRange = namedtuple(
+    "ReferenceRange", ["book_id", "start_chapter", "start_verse", "end_chapter", "end_verse"]
+)
+
+# Stands in for "to the end of the chapter"; no chapter comes close.
+LAST_VERSE = 999
+# No book has more chapters, no chapter more verses; larger numbers would overflow SQLite's integers.
+MAX_REFERENCE_NUMBER = 999
+
+REFERENCE_PATTERN = re.compile(r"^(?P<book>.*?)\s*(?P<spec>\d[\d:,\-\s]*)$")
+DASHES = str.maketrans({"–": "-", "—": "-"})
+
+
+class PassageError(ValueError):
+    pass
+
+
+def _parse_number(text):
+    number = int(text)
+    if number > MAX_REFERENCE_NUMBER:
+        raise PassageError(f"Number too large: {number}")
+    return number
+
+
+def _parse_point(text, chapter):
+    # "3:16" -> (3, 16, True); "16" inside a chapter -> (chapter, 16, True);
+    # a bare "23" outside one is a whole chapter -> (23, None, False).
+    text = text.strip()
+    if ":" in text:
+        chapter_text, verse_text = text.split(":", 1)
+        return _parse_number(chapter_text), _parse_number(verse_text), True
+    if chapter is not None:
+        return chapter, _parse_number(text), True
+    return _parse_number(text), None, False
+
+
+def _parse_spec(book_id, spec):
+    ranges = []
+    chapter = None
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        left, _, right = item.partition("-")
+        start_chapter, start_verse, has_verse = _parse_point(left, chapter)
+        if not right.strip():
+            end_chapter = start_chapter
+            end_verse = start_verse if has_verse else LAST_VERSE
+        elif ":" in right:
+            end_chapter, end_verse, _ = _parse_point(right, None)
+        elif has_verse:
+            end_chapter, end_verse = start_chapter, _parse_number(right)
+        else:
+            end_chapter, end_verse = _parse_number(right), LAST_VERSE
+        if start_verse is None:
+            start_verse = 1
+        if (end_chapter, end_verse) < (start_chapter, start_verse):
+            raise PassageError(f"Range runs backwards: {item}")
+        if has_verse or ":" in right:
+            chapter = end_chapter
+        ranges.append(ReferenceRange(book_id, start_chapter, start_verse, end_chapter, end_verse))
+    return ranges
+
+
+def parse_passage(text, resolver):
+    # "John 3:16-18", "Rom 8:28,38-39", "Gen 1:1-2:3", "Ps 23; Ps 91:1".
+    # A reference without a book reuses the previous one: "John 3:16; 4:1".
+    ranges = []
+    book_id = None
+    for reference in text.translate(DASHES).split(";"):
+        reference = reference.strip()
+        if not reference:
+            continue
+        match = REFERENCE_PATTERN.match(reference)
+        if not match:
+            raise PassageError(f"Could not read reference: {reference}")
+        book_name = match.group("book").strip()
+        if book_name:
+            book_id = resolver.resolve(book_name)
+            if book_id is None:
+                raise PassageError(f"Unknown book: {book_name}")
+        elif book_id is None:
+            raise PassageError(f"Missing book name: {reference}")
+        try:
+            ranges.extend(_parse_spec(book_id, match.group("spec")))
+        except PassageError:
+            raise
+        except ValueError:
+            raise PassageError(f"Could not read reference: {reference}") from None
+    if not ranges:
+        raise PassageError("No reference given")
+    return ranges
+
+
+def fetch_passage(cursor, ranges):
+    # One indexed range scan per book: the envelope of that book's ranges
+    # bounds the seek on (book_id, chapter, verse), the ORs pick the pieces.
+    by_book = {}
+    for reference_range in ranges:
+        by_book.setdefault(reference_range.book_id, []).append(reference_range)
+    rows_by_book = {}
+    for book_id, book_ranges in by_book.items():
+        low = min((r.start_chapter, r.start_verse) for r in book_ranges)
+        high = max((r.end_chapter, r.end_verse) for r in book_ranges)
+        pieces = " OR ".join(["(v.chapter, v.verse) BETWEEN (?, ?) AND (?, ?)"] * len(book_ranges))
+        params = [book_id, *low, *high]
+        for r in book_ranges:
+            params.extend([r.start_chapter, r.start_verse, r.end_chapter, r.end_verse])
+        cursor.execute(f'''
+            SELECT v.chapter, v.verse, v.text
+            FROM verses v
+            WHERE v.book_id = ? AND (v.chapter, v.verse) BETWEEN (?, ?) AND (?, ?)
+            AND ({pieces})
+            ORDER BY v.chapter, v.verse
+        ''', params)
+        rows_by_book[book_id] = cursor.fetchall()
+    # Hand the verses back per range, in the order they were asked for.
+    passage = []
+    for r in ranges:
+        rows = [
+            row for row in rows_by_book[r.book_id]
+            if (r.start_chapter, r.start_verse) <= (row[0], row[1]) <= (r.end_chapter, r.end_verse)
+        ]
+        passage.append((r, rows))
+    return passage
+
+
+def format_range(book_name, rows):
+    # Uses the verses actually found, so "Psalms 23" reads "Psalms 23:1-6".
+    if not rows:
+        return book_name
+    first_chapter, first_verse = rows[0][0], rows[0][1]
+    last_chapter, last_verse = rows[-1][0], rows[-1][1]
+    if (first_chapter, first_verse) == (last_chapter, last_verse):
+        return f"{book_name} {first_chapter}:{first_verse}"
+    if first_chapter == last_chapter:
+        return f"{book_name} {first_chapter}:{first_verse}-{last_verse}"
+    return f"{book_name} {first_chapter}:{first_verse}-{last_chapter}:{last_verse}"
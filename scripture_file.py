@@ -0,0 +1,145 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+
+MAGIC = b"BIBL"
+FORMAT_VERSION = 2
+# magic, format version, book count, chapter count, verse count, then the
+# byte offsets of the chapter table, verse table, names blob and text blob.
+HEADER = struct.Struct("<4sHHIIIIII")
+# Per book: book_id, first chapter index, chapter count, name offset, name length.
+BOOK_FIELDS = 5
+
+
+def _u32_array(values):
+    table = array('I', values)
+    if sys.byteorder != "little":
+        table.byteswap()
+    return table
+
+
+def write_scripture_file(cursor, path):
+    # Layout: header | books | chapter starts | verse offsets | names | text.
+    # Every table is little-endian uint32, so readers map them without parsing.
+    cursor.execute("SELECT book_id, book_name FROM books ORDER BY book_id")
+    books = cursor.fetchall()
+    cursor.execute("SELECT book_id, chapter, text FROM verses ORDER BY book_id, chapter, verse")
+
+    book_table = []
+    chapter_starts = []
+    verse_offsets = []
+    names = bytearray()
+    text = bytearray()
+    chapters_by_book = {}
+    last_chapter = None
+    verse_count = 0
+    for book_id, chapter, verse_text in cursor:
+        if (book_id, chapter) != last_chapter:
+            chapters_by_book.setdefault(book_id, []).append(len(chapter_starts))
+            chapter_starts.append(verse_count)
+            last_chapter = (book_id, chapter)
+        verse_offsets.append(len(text))
+        text.extend(verse_text.encode('utf-8'))
+        verse_count += 1
+    chapter_starts.append(verse_count)
+    verse_offsets.append(len(text))
+
+    for book_id, book_name in books:
+        chapters = chapters_by_book.get(book_id, [])
+        encoded = book_name.encode('utf-8')
+        book_table.extend([
+            book_id,
+            chapters[0] if chapters else 0,
+            len(chapters),
+            len(names),
+            len(encoded),
+        ])
+        names.extend(encoded)
+
+    book_bytes = _u32_array(book_table).tobytes()
+    chapter_bytes = _u32_array(chapter_starts).tobytes()
+    verse_bytes = _u32_array(verse_offsets).tobytes()
+    chapters_offset = HEADER.size + len(book_bytes)
+    verses_offset = chapters_offset + len(chapter_bytes)
+    names_offset = verses_offset + len(verse_bytes)
+    text_offset = names_offset + len(names)
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, len(books), len(chapter_starts) - 1, verse_count,
+        chapters_offset, verses_offset, names_offset, text_offset,
+    )
+
+    # Written beside the target and renamed, so running bots keep their old mapping intact.
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        for part in (header, book_bytes, chapter_bytes, verse_bytes, names, text):
+            f.write(part)
+    os.replace(temp_path, path)
+    return verse_count
+
+
+class ScriptureFile:
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, book_count, _, self.verse_count,
+         chapters_offset, verses_offset, names_offset, text_offset) = HEADER.unpack_from(self.mapping)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} scripture file")
+        if sys.byteorder != "little":
+            raise ValueError("Scripture files can only be mapped on little-endian machines")
+        view = memoryview(self.mapping)
+        # Typed views straight onto the mapping: no table is copied into Python objects.
+        self.chapter_starts = view[chapters_offset:verses_offset].cast('I')
+        self.verse_offsets = view[verses_offset:names_offset].cast('I')
+        self.text = view[text_offset:]
+        book_table = view[HEADER.size:chapters_offset].cast('I')
+        self.books = {}
+        for index in range(book_count):
+            book_id, first_chapter, chapters, name_offset, name_length = (
+                book_table[index * BOOK_FIELDS:(index + 1) * BOOK_FIELDS]
+            )
+            name_start = names_offset + name_offset
+            name = bytes(view[name_start:name_start + name_length]).decode('utf-8')
+            self.books[book_id] = (name, first_chapter, chapters)
+
+    def _verse_text(self, index):
+        start = self.verse_offsets[index]
+        end = self.verse_offsets[index + 1]
+        return str(self.text[start:end], 'utf-8')
+
+    def _chapter_index(self, book_id, chapter):
+        book = self.books.get(book_id)
+        if book is None or not 1 <= chapter <= book[2]:
+            return None
+        return book[1] + chapter - 1
+
+    def get_verse(self, book_id, chapter, verse):
+        chapter_index = self._chapter_index(book_id, chapter)
+        if chapter_index is None:
+            return None
+        first = self.chapter_starts[chapter_index]
+        if not 1 <= verse <= self.chapter_starts[chapter_index + 1] - first:
+            return None
+        return (self.books[book_id][0], chapter, verse, self._verse_text(first + verse - 1))
+
+    def get_chapter(self, book_id, chapter):
+        chapter_index = self._chapter_index(book_id, chapter)
+        if chapter_index is None:
+            return []
+        first = self.chapter_starts[chapter_index]
+        last = self.chapter_starts[chapter_index + 1]
+        return [(index - first + 1, self._verse_text(index)) for index in range(first, last)]
+
+
+def open_scripture_file(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        return ScriptureFile(path)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not map {path}: {e}", flush=True)
+        return None
@@ -1,22 +1,11 @@
-import sqlite3
+from database import get_database
+from search_engine import SEARCH_BACKEND, create_search_engine
+
+engine = create_search_engine(SEARCH_BACKEND)
+
 
 def search_bible(keyword):
-    conn = sqlite3.connect('bible.db')
-    cursor = conn.cursor()
-    
-    query = '''
-        SELECT b.book_name, v.chapter, v.verse, v.text
-        FROM verses v
-        JOIN books b ON v.book_id = b.book_id
-        WHERE v.text LIKE ?
-        LIMIT 10
-    '''
-    
-    cursor.execute(query, (f'%{keyword}%',))
-    results = cursor.fetchall()
-    conn.close()
-    
-    return results
+    return engine.search(keyword, limit=10)
 
 
 def display_results(keyword, results):
@@ -53,3 +42,7 @@ display_results(keyword, results)
 keyword = "hope"
 results = search_bible(keyword)
 display_results(keyword, results)
+
+print("")
+print("⏱️ Query timings:")
+print(get_database().stats.summary())
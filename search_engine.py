@@ -0,0 +1,315 @@
+import heapq
+import os
+from array import array
+
+from book_resolver import get_book_resolver
+from database import get_database
+from normalizer import WORD_PATTERN, normalize_token
+from query_parser import parse_query, query_words, replace_words, to_fts_match, to_like_sql
+from spelling import SpellingCorrector
+
+
+DB_PATH = "bible.db"
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "fts")
+RESULT_COLUMNS = "b.book_name, v.chapter, v.verse, v.text"
+
+
+def create_fts_table(cursor):
+    # External-content FTS5 table over the normalized verses.tokens column:
+    # the index lives in verses_fts, the tokens stay in verses.
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS verses_fts USING fts5(
+            tokens,
+            content='verses',
+            content_rowid='id'
+        )
+    ''')
+
+
+def rebuild_fts_index(cursor):
+    # Dropped first so databases indexed before the tokens column get the new schema.
+    cursor.execute("DROP TABLE IF EXISTS verses_fts")
+    create_fts_table(cursor)
+    cursor.execute("INSERT INTO verses_fts(verses_fts) VALUES('rebuild')")
+
+
+class SearchEngine:
+
+    corrector = None
+
+    def search(self, keyword, limit=5, ids_only=False):
+        return self.search_query(parse_query(keyword), limit, ids_only)
+
+    def search_with_suggestion(self, keyword, limit=5, ids_only=False):
+        # Returns (results, suggestion). When nothing matches, misspelled terms
+        # are corrected from the trigram index and the search runs once more;
+        # suggestion is the corrected query text, or None.
+        # With ids_only the results are ranked verse ids instead of verse rows.
+        parsed = parse_query(keyword)
+        results = self.search_query(parsed, limit, ids_only)
+        if results or self.corrector is None or parsed.expression is None:
+            return results, None
+        corrections = self.corrector.correct_words(set(query_words(parsed.expression)))
+        if not corrections:
+            return results, None
+        corrected = parsed._replace(expression=replace_words(parsed.expression, corrections))
+        results = self.search_query(corrected, limit, ids_only)
+        if not results:
+            return results, None
+        suggestion = WORD_PATTERN.sub(lambda match: corrections.get(match.group(0).lower(), match.group(0)), keyword)
+        return results, suggestion
+
+
+class FtsSearchEngine(SearchEngine):
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self.db = get_database(db_path)
+        self.has_fts = self._check_fts_table()
+        self.corrector = SpellingCorrector.from_database(db_path)
+
+    def _check_fts_table(self):
+        result = self.db.fetchone("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'verses_fts'")
+        return result is not None
+
+    def like_search(self, keyword, limit=5):
+        parsed = parse_query(keyword)
+        book_id = None
+        if parsed.book:
+            book_id = get_book_resolver(self.db_path).resolve(parsed.book)
+            if book_id is None:
+                return []
+        return self._run_like_query(parsed, book_id, limit)
+
+    def search_query(self, parsed, limit=5, ids_only=False):
+        book_id = None
+        if parsed.book:
+            book_id = get_book_resolver(self.db_path).resolve(parsed.book)
+            if book_id is None:
+                return []
+        if not self.has_fts:
+            return self._run_like_query(parsed, book_id, limit, ids_only)
+        columns = "v.id" if ids_only else RESULT_COLUMNS
+        conditions, params = _filter_conditions(parsed, book_id)
+        if parsed.expression is not None:
+            # Every user word is emitted as a quoted FTS5 term, so input can never
+            # break the MATCH syntax, and "love" still finds "loved" and "loveth".
+            match_query = to_fts_match(parsed.expression)
+            if not match_query:
+                return []
+            query = f'''
+                SELECT {columns}
+                FROM verses_fts
+                JOIN verses v ON v.id = verses_fts.rowid
+                JOIN books b ON v.book_id = b.book_id
+                WHERE verses_fts MATCH ?
+            '''
+            params = [match_query] + params
+            order = "rank"
+        elif conditions:
+            query = f'''
+                SELECT {columns}
+                FROM verses v
+                JOIN books b ON v.book_id = b.book_id
+                WHERE 1
+            '''
+            order = "v.id"
+        else:
+            return []
+        for condition in conditions:
+            query += f" AND {condition}"
+        query += f" ORDER BY {order} LIMIT ?"
+        return self._fetch(query, params + [limit], ids_only)
+
+    def _run_like_query(self, parsed, book_id, limit, ids_only=False):
+        conditions, params = _filter_conditions(parsed, book_id)
+        if parsed.expression is not None:
+            # Match the FTS path: a query made only of negations finds nothing.
+            if not to_fts_match(parsed.expression):
+                return []
+            like_sql, like_params = to_like_sql(parsed.expression)
+            conditions.insert(0, f"({like_sql})")
+            params = like_params + params
+        if not conditions:
+            return []
+        query = f'''
+            SELECT {"v.id" if ids_only else RESULT_COLUMNS}
+            FROM verses v
+            JOIN books b ON v.book_id = b.book_id
+            WHERE ''' + " AND ".join(conditions) + " ORDER BY v.id LIMIT ?"
+        return self._fetch(query, params + [limit], ids_only)
+
+    def _fetch(self, query, params, ids_only=False):
+        rows = self.db.fetchall(query, params)
+        if ids_only:
+            return [row[0] for row in rows]
+        return rows
+
+
+def _filter_conditions(parsed, book_id):
+    # Filters stay inside the same statement as the MATCH, so a filtered
+    # query is still a single round trip.
+    conditions = []
+    params = []
+    if parsed.book:
+        conditions.append("v.book_id = ?")
+        params.append(book_id)
+    if parsed.testament:
+        conditions.append("b.testament = ?")
+        params.append(parsed.testament)
+    return conditions, params
+
+
+def intersect_postings(left, right):
+    # Merge-intersect two sorted id arrays.
+    result = array('I')
+    i = j = 0
+    len_left, len_right = len(left), len(right)
+    while i < len_left and j < len_right:
+        a, b = left[i], right[j]
+        if a == b:
+            result.append(a)
+            i += 1
+            j += 1
+        elif a < b:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def subtract_postings(left, right):
+    result = array('I')
+    j = 0
+    len_right = len(right)
+    for verse_id in left:
+        while j < len_right and right[j] < verse_id:
+            j += 1
+        if j == len_right or right[j] != verse_id:
+            result.append(verse_id)
+    return result
+
+
+def union_postings(postings_lists):
+    if len(postings_lists) == 1:
+        return postings_lists[0]
+    result = array('I')
+    last = None
+    for verse_id in heapq.merge(*postings_lists):
+        if verse_id != last:
+            result.append(verse_id)
+            last = verse_id
+    return result
+
+
+class InvertedIndexEngine(SearchEngine):
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self.db = get_database(db_path)
+        self.corrector = SpellingCorrector.from_database(db_path)
+        self.verses = {}
+        self.verse_tokens = {}
+        self.verse_books = {}
+        self.books = {}
+        self.postings = {}
+        self._load()
+
+    def _load(self):
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT book_id, book_name, testament FROM books ORDER BY book_id")
+            self.books = {book_id: (book_name, testament) for book_id, book_name, testament in cursor.fetchall()}
+            cursor.execute('''
+                SELECT v.id, v.book_id, b.book_name, v.chapter, v.verse, v.text, v.tokens
+                FROM verses v
+                JOIN books b ON v.book_id = b.book_id
+                ORDER BY v.id
+            ''')
+            postings = {}
+            for verse_id, book_id, book_name, chapter, verse, text, tokens in cursor:
+                self.verses[verse_id] = (book_name, chapter, verse, text)
+                self.verse_tokens[verse_id] = tokens
+                self.verse_books[verse_id] = book_id
+                # Rows arrive in id order, so every postings array stays sorted.
+                for token in set(tokens.split()):
+                    ids = postings.get(token)
+                    if ids is None:
+                        ids = postings[token] = array('I')
+                    ids.append(verse_id)
+        self.postings = postings
+
+    def _phrase_postings(self, words):
+        word_postings = sorted((self.postings.get(word, array('I')) for word in words), key=len)
+        candidates = word_postings[0]
+        for postings in word_postings[1:]:
+            candidates = intersect_postings(candidates, postings)
+        size = len(words)
+        result = array('I')
+        for verse_id in candidates:
+            tokens = self.verse_tokens[verse_id].split()
+            if any(tuple(tokens[i:i + size]) == words for i in range(len(tokens) - size + 1)):
+                result.append(verse_id)
+        return result
+
+    def _evaluate(self, node):
+        # Returns a sorted id array, or None for a branch made only of negations.
+        kind = node[0]
+        if kind == "term":
+            return self.postings.get(normalize_token(node[1]), array('I'))
+        if kind == "phrase":
+            return self._phrase_postings(tuple(normalize_token(word) for word in node[1]))
+        if kind == "not":
+            return None
+        if kind == "or":
+            parts = [part for part in (self._evaluate(child) for child in node[1]) if part is not None]
+            return union_postings(parts) if parts else None
+        positives = [self._evaluate(child) for child in node[1] if child[0] != "not"]
+        positives = sorted((part for part in positives if part is not None), key=len)
+        if not positives:
+            return None
+        matched = positives[0]
+        for postings in positives[1:]:
+            if not matched:
+                break
+            matched = intersect_postings(matched, postings)
+        for child in node[1]:
+            if child[0] == "not" and matched:
+                excluded = self._evaluate(child[1])
+                if excluded is not None:
+                    matched = subtract_postings(matched, excluded)
+        return matched
+
+    def search_query(self, parsed, limit=5, ids_only=False):
+        if parsed.expression is not None:
+            matched = self._evaluate(parsed.expression)
+            if matched is None:
+                return []
+        elif parsed.book or parsed.testament:
+            matched = self.verses.keys()
+        else:
+            return []
+        if parsed.book:
+            book_id = get_book_resolver(self.db_path).resolve(parsed.book)
+            matched = [verse_id for verse_id in matched if self.verse_books[verse_id] == book_id]
+        if parsed.testament:
+            matched = [
+                verse_id for verse_id in matched
+                if self.books[self.verse_books[verse_id]][1] == parsed.testament
+            ]
+        if parsed.expression is None:
+            best = list(matched)[:limit]
+        else:
+            # Shorter verses are denser in the query terms, which is what bm25 rewards.
+            best = heapq.nsmallest(limit, matched, key=lambda verse_id: (len(self.verses[verse_id][3]), verse_id))
+        if ids_only:
+            return best
+        return [self.verses[verse_id] for verse_id in best]
+
+
+def create_search_engine(backend=SEARCH_BACKEND, db_path=DB_PATH):
+    if backend == "memory":
+        return InvertedIndexEngine(db_path)
+    if backend == "fts":
+        return FtsSearchEngine(db_path)
+    raise ValueError(f"Unknown search backend: {backend}")
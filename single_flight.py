@@ -0,0 +1,37 @@
+import asyncio
+from collections import Counter
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one in-flight computation."""
+
+    def __init__(self):
+        self.in_flight = {}
+        self.calls = Counter()
+        self.collapsed = Counter()
+
+    async def do(self, key, make_awaitable):
+        # key is a tuple whose first item names the kind of lookup, for the counters.
+        future = self.in_flight.get(key)
+        if future is not None:
+            self.collapsed[key[0]] += 1
+        else:
+            self.calls[key[0]] += 1
+            future = asyncio.ensure_future(make_awaitable())
+            self.in_flight[key] = future
+            future.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        # Shielded, so one caller giving up does not cancel the others' result.
+        return await asyncio.shield(future)
+
+    def stats(self):
+        return {
+            kind: (self.calls[kind], self.collapsed[kind])
+            for kind in sorted(set(self.calls) | set(self.collapsed))
+        }
+
+    def summary(self):
+        parts = [
+            f"{kind} {collapsed}/{calls + collapsed}"
+            for kind, (calls, collapsed) in self.stats().items()
+        ]
+        return ", ".join(parts) if parts else "no calls yet"
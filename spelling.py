@@ -0,0 +1,138 @@
+import heapq
+from array import array
+from collections import Counter
+
+from database import get_database
+from normalizer import tokenize
+
+
+MIN_CORRECTABLE_LENGTH = 4
+CANDIDATES_TO_VERIFY = 12
+
+
+def create_spelling_tables(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS vocabulary (
+            word_id INTEGER PRIMARY KEY,
+            word TEXT NOT NULL UNIQUE,
+            frequency INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS vocabulary_trigrams (
+            trigram TEXT NOT NULL,
+            word_id INTEGER NOT NULL,
+            PRIMARY KEY (trigram, word_id)
+        ) WITHOUT ROWID
+    ''')
+
+
+def trigrams(word):
+    padded = f"^{word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def build_spelling_index(cursor):
+    cursor.execute("DELETE FROM vocabulary_trigrams")
+    cursor.execute("DELETE FROM vocabulary")
+    frequencies = Counter()
+    cursor.execute("SELECT text FROM verses")
+    for (text,) in cursor.fetchall():
+        frequencies.update(tokenize(text))
+    for word_id, word in enumerate(sorted(frequencies), 1):
+        cursor.execute(
+            "INSERT INTO vocabulary (word_id, word, frequency) VALUES (?, ?, ?)",
+            (word_id, word, frequencies[word])
+        )
+        cursor.executemany(
+            "INSERT INTO vocabulary_trigrams (trigram, word_id) VALUES (?, ?)",
+            [(trigram, word_id) for trigram in trigrams(word)]
+        )
+    return len(frequencies)
+
+
+def edit_distance(a, b, max_distance):
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+class SpellingCorrector:
+
+    def __init__(self, words, frequencies, trigram_postings):
+        # words is sorted by word_id, so word_id - 1 indexes both lists.
+        self.words = words
+        self.frequencies = frequencies
+        self.trigram_postings = trigram_postings
+        self.known = set(words)
+
+    @classmethod
+    def from_database(cls, db_path):
+        with get_database(db_path).reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'vocabulary_trigrams'")
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute("SELECT word, frequency FROM vocabulary ORDER BY word_id")
+            rows = cursor.fetchall()
+            trigram_postings = {}
+            cursor.execute("SELECT trigram, word_id FROM vocabulary_trigrams")
+            for trigram, word_id in cursor:
+                ids = trigram_postings.get(trigram)
+                if ids is None:
+                    ids = trigram_postings[trigram] = array('I')
+                ids.append(word_id - 1)
+        if not rows:
+            return None
+        return cls([row[0] for row in rows], array('I', [row[1] for row in rows]), trigram_postings)
+
+    def is_known(self, word):
+        return word in self.known
+
+    def correct_word(self, word):
+        if len(word) < MIN_CORRECTABLE_LENGTH or self.is_known(word):
+            return None
+        max_distance = 1 if len(word) <= 5 else 2
+        word_trigrams = trigrams(word)
+        shared = Counter()
+        for trigram in word_trigrams:
+            shared.update(self.trigram_postings.get(trigram, ()))
+        if not shared:
+            return None
+        # Rank by trigram overlap (Dice coefficient) and only run the exact
+        # edit distance on the handful of best candidates.
+        candidates = heapq.nlargest(
+            CANDIDATES_TO_VERIFY,
+            shared.items(),
+            key=lambda item: item[1] / (len(word_trigrams) + len(self.words[item[0]])),
+        )
+        best = None
+        for index, _ in candidates:
+            candidate = self.words[index]
+            distance = edit_distance(word, candidate, max_distance)
+            if distance > max_distance:
+                continue
+            rank = (distance, -self.frequencies[index])
+            if best is None or rank < best[0]:
+                best = (rank, candidate)
+        return best[1] if best else None
+
+    def correct_words(self, words):
+        corrections = {}
+        for word in words:
+            correction = self.correct_word(word)
+            if correction:
+                corrections[word] = correction
+        return corrections
@@ -0,0 +1,38 @@
+import sys
+import threading
+
+
+class SubscriberCache:
+    """chat_id -> timezone for every subscriber, kept in step with the table by write-through."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timezones = {}
+        self.loaded = False
+
+    def load(self, rows):
+        # rows yields (chat_id, timezone, ...); timezones are interned, there are only a few dozen.
+        timezones = {}
+        for row in rows:
+            timezones[row[0]] = sys.intern(row[1] or 'UTC')
+        with self.lock:
+            self.timezones = timezones
+            self.loaded = True
+        return len(timezones)
+
+    def __contains__(self, chat_id):
+        return chat_id in self.timezones
+
+    def timezone(self, chat_id):
+        return self.timezones.get(chat_id)
+
+    def count(self):
+        return len(self.timezones)
+
+    def set(self, chat_id, timezone):
+        with self.lock:
+            self.timezones[chat_id] = sys.intern(timezone or 'UTC')
+
+    def remove(self, chat_id):
+        with self.lock:
+            self.timezones.pop(chat_id, None)
@@ -1,16 +1,90 @@
+import asyncio
+import hashlib
+import itertools
 import sqlite3
-import random
 import os
-from datetime import date, time, datetime, timedelta
-from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
+import time
+from array import array
+from datetime import date, datetime, timedelta
+from telegram import (
+    InlineKeyboardButton, InlineKeyboardMarkup, InlineQueryResultArticle, InputTextMessageContent, Update
+)
+from telegram.ext import (
+    Application, CallbackQueryHandler, CommandHandler, InlineQueryHandler, MessageHandler, filters, ContextTypes
+)
 from flask import Flask
 from threading import Thread
 import pytz
+from search_engine import SEARCH_BACKEND, create_search_engine
+from query_parser import normalize_query_key
+from cache import LRUCache, cached
+from migrations import run_migrations
+from database import close_databases, get_database
+from book_resolver import get_book_resolver, reset_book_resolvers
+from references import MAX_REFERENCE_NUMBER, PassageError, fetch_passage, format_range, parse_passage
+from scripture_file import open_scripture_file
+from random_verses import MODES as RANDOM_MODES, RandomVersePool
+from votd_calendar import CALENDAR_DAYS, extend_calendar
+from broadcast import Broadcaster
+from deliveries import DeliveryLedger
+from subscriber_cache import SubscriberCache
+from single_flight import SingleFlight
+from message_stream import CHUNK_PACING, MESSAGE_LIMIT, pack_messages, send_chunks
+from daily_schedule import get_timezone, local_date, next_send_timestamp
+from hot_queries import HotQueryRecorder, warm_caches, warm_page_cache
+from inline_index import INLINE_RESULT_LIMIT, InlineIndex
+import templates
+from templates import PARSE_MODE
 
 
 TOKEN = os.environ.get("BOT_TOKEN")
 DB_PATH = "bible.db"
+SCRIPTURE_FILE = os.environ.get("SCRIPTURE_FILE", "bible.bin")
+
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", 2048))
+CACHE_MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", 16 * 1024 * 1024))
+CACHE_TTL = int(os.environ.get("CACHE_TTL", 24 * 3600))
+SCRIPTURE_VERSION_CHECK_INTERVAL = 60
+HOT_QUERIES_PATH = os.environ.get("HOT_QUERIES_PATH", "hot_queries.json")
+HOT_QUERIES_SAVE_INTERVAL = 600
+WARMUP_BUDGET_SECONDS = float(os.environ.get("WARMUP_BUDGET_SECONDS", 5))
+WARMUP_QUERY_LIMIT = 200
+MAX_PASSAGE_VERSES = 200
+DAILY_JOB_NAME = "daily_verses"
+# Sends missed by more than this (bot was down) are skipped, not delivered late.
+DAILY_SEND_GRACE = 3600
+# Upper bound on a scheduler sleep, so rows changed outside the bot are still picked up.
+DAILY_MAX_SLEEP = 3600
+DAILY_RETRY_DELAY = 60
+BROADCAST_RATE = float(os.environ.get("BROADCAST_RATE", 25))
+BROADCAST_CONCURRENCY = int(os.environ.get("BROADCAST_CONCURRENCY", 20))
+DELIVERY_PAGE_SIZE = 1000
+SUBSCRIBER_PAGE_SIZE = 500
+SEARCH_PAGE_SIZE = 5
+BOOK_PAGE_SIZE = 10
+# Ranked ids kept per search; the id list is what the Next/Prev buttons page through.
+MAX_RESULT_IDS = 500
+RESULT_SET_MAX_ENTRIES = 1024
+RESULT_SET_MAX_BYTES = 8 * 1024 * 1024
+RESULT_SET_TTL = 3600
+# Telegram caches inline answers server-side for this long, so repeat keystrokes never reach the bot.
+INLINE_CACHE_SECONDS = 300
+
+verse_search = None
+inline_index = None
+scripture_file = None
+random_verses = None
+scripture_version = None
+scripture_cache = LRUCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_TTL)
+# token -> (title, verse ids, page size), for the pagination buttons.
+result_sets = LRUCache(RESULT_SET_MAX_ENTRIES, RESULT_SET_MAX_BYTES, RESULT_SET_TTL)
+db = get_database(DB_PATH)
+delivery_ledger = DeliveryLedger(DB_PATH)
+subscriber_cache = SubscriberCache()
+single_flight = SingleFlight()
+# Only one daily send runs at a time; a wakeup that arrives mid-run leaves the work to it.
+daily_send_lock = asyncio.Lock()
+hot_queries = HotQueryRecorder(HOT_QUERIES_PATH)
 
 TIMEZONE_OPTIONS = {
     "1": ("🇬🇧 UK (London)", "Europe/London"),
@@ -46,217 +120,316 @@ def keep_alive():
     t.start()
 
 
-def setup_subscribers_table():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS subscribers (
-            chat_id INTEGER PRIMARY KEY,
-            username TEXT,
-            first_name TEXT,
-            subscribed_date TEXT,
-            timezone TEXT DEFAULT 'UTC'
-        )
-    ''')
-    conn.commit()
-    conn.close()
-    print("✅ Subscribers table ready", flush=True)
+def setup_database():
+    version = run_migrations(DB_PATH)
+    print(f"✅ Database schema ready (version {version})", flush=True)
 
 
 def add_subscriber(chat_id, username=None, first_name=None, timezone='UTC'):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    next_send_at = next_send_timestamp(timezone, datetime.now(pytz.UTC))
     try:
-        cursor.execute('''
-            INSERT OR REPLACE INTO subscribers (chat_id, username, first_name, subscribed_date, timezone)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (chat_id, username, first_name, date.today().isoformat(), timezone))
-        conn.commit()
-        success = True
+        # Holding the write lock keeps the cache in the same order as the table.
+        with db.write_lock:
+            db.execute('''
+                INSERT OR REPLACE INTO subscribers (chat_id, username, first_name, subscribed_date, timezone, next_send_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (chat_id, username, first_name, date.today().isoformat(), timezone, next_send_at))
+            subscriber_cache.set(chat_id, timezone)
+        return True
     except Exception as e:
         print(f"Error adding subscriber: {e}", flush=True)
-        success = False
-    conn.close()
-    return success
+        return False
 
 
 def update_subscriber_timezone(chat_id, timezone):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('UPDATE subscribers SET timezone = ? WHERE chat_id = ?', (timezone, chat_id))
-    conn.commit()
-    rows_updated = cursor.rowcount
-    conn.close()
+    next_send_at = next_send_timestamp(timezone, datetime.now(pytz.UTC))
+    with db.write_lock:
+        rows_updated = db.execute(
+            'UPDATE subscribers SET timezone = ?, next_send_at = ? WHERE chat_id = ?',
+            (timezone, next_send_at, chat_id)
+        )
+        if rows_updated:
+            subscriber_cache.set(chat_id, timezone)
     return rows_updated > 0
 
 
 def get_subscriber_timezone(chat_id):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('SELECT timezone FROM subscribers WHERE chat_id = ?', (chat_id,))
-    result = cursor.fetchone()
-    conn.close()
+    if subscriber_cache.loaded:
+        return subscriber_cache.timezone(chat_id)
+    result = db.fetchone('SELECT timezone FROM subscribers WHERE chat_id = ?', (chat_id,))
     return result[0] if result else None
 
 
 def remove_subscriber(chat_id):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM subscribers WHERE chat_id = ?', (chat_id,))
-    conn.commit()
-    rows_deleted = cursor.rowcount
-    conn.close()
+    with db.write_lock:
+        rows_deleted = db.execute('DELETE FROM subscribers WHERE chat_id = ?', (chat_id,))
+        subscriber_cache.remove(chat_id)
     return rows_deleted > 0
 
 
 def is_subscribed(chat_id):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('SELECT chat_id FROM subscribers WHERE chat_id = ?', (chat_id,))
-    result = cursor.fetchone()
-    conn.close()
-    return result is not None
+    if subscriber_cache.loaded:
+        return chat_id in subscriber_cache
+    return db.fetchone('SELECT chat_id FROM subscribers WHERE chat_id = ?', (chat_id,)) is not None
+
+
+def iter_subscriber_pages(page_size=SUBSCRIBER_PAGE_SIZE, timezone=None, due_before=None):
+    # Keyset pages on chat_id: each page is one short query on the primary key, so
+    # memory stays at one page and no read is held open between pages.
+    conditions = ["chat_id > ?"]
+    params = []
+    if timezone is not None:
+        conditions.append("timezone = ?")
+        params.append(timezone)
+    if due_before is not None:
+        conditions.append("next_send_at <= ?")
+        params.append(due_before)
+    query = f"""
+        SELECT chat_id, timezone, next_send_at FROM subscribers
+        WHERE {' AND '.join(conditions)}
+        ORDER BY chat_id
+        LIMIT ?
+    """
+    # Group chats have negative ids, so start below every possible chat_id.
+    last_chat_id = -2 ** 63
+    while True:
+        page = db.fetchall(query, [last_chat_id] + params + [page_size])
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        last_chat_id = page[-1][0]
 
 
-def get_all_subscribers():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('SELECT chat_id, timezone FROM subscribers')
-    results = cursor.fetchall()
-    conn.close()
-    return results
+def iter_subscribers(page_size=SUBSCRIBER_PAGE_SIZE, timezone=None, due_before=None):
+    for page in iter_subscriber_pages(page_size, timezone, due_before):
+        yield from page
+
+
+def get_next_send_at():
+    return db.fetchone('SELECT MIN(next_send_at) FROM subscribers')[0]
 
 
 def get_subscriber_count():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('SELECT COUNT(*) FROM subscribers')
-    count = cursor.fetchone()[0]
-    conn.close()
-    return count
+    if subscriber_cache.loaded:
+        return subscriber_cache.count()
+    return db.fetchone('SELECT COUNT(*) FROM subscribers')[0]
+
+
+def search_key(keyword, limit=5):
+    return normalize_query_key(keyword), limit
+
+
+def search_ids_key(keyword, limit=MAX_RESULT_IDS):
+    # Same defaults as search_verse_ids, so a call with and without the limit shares one entry.
+    return normalize_query_key(keyword), limit
+
+
+def reference_key(book_name, *numbers):
+    return (" ".join(book_name.split()).casefold(),) + numbers
+
+
+def passage_key(text):
+    return " ".join(text.split()).casefold()
+
+
+def day_key(day=None):
+    return (day or date.today()).isoformat()
+
+
+def votd_message_key(variant, day=None):
+    return variant, day_key(day)
+
+
+def topic_key(topic_name, limit=5):
+    return topic_name.strip().lower(), limit
+
+
+def verse_block_key(book, chapter, verse, text):
+    return book, chapter, verse
+
+
+def no_key():
+    return ()
+
+
+def resolve_book(book_name):
+    return get_book_resolver(DB_PATH).resolve(book_name)
 
 
+def canonical_book_name(book_id):
+    return get_book_resolver(DB_PATH).book_name(book_id)
+
+
+def get_scripture_version():
+    try:
+        result = db.fetchone("SELECT value FROM metadata WHERE key = 'scripture_version'")
+    except sqlite3.OperationalError:
+        result = None
+    return result[0] if result else None
+
+
+@cached(scripture_cache, search_key)
 def search_bible(keyword, limit=5):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    query = '''
-        SELECT b.book_name, v.chapter, v.verse, v.text
-        FROM verses v
-        JOIN books b ON v.book_id = b.book_id
-        WHERE v.text LIKE ?
-        LIMIT ?
-    '''
-    cursor.execute(query, (f'%{keyword}%', limit))
-    results = cursor.fetchall()
-    conn.close()
-    return results
+    return verse_search.search(keyword, limit)
 
 
-def get_random_verse():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    query = '''
-        SELECT b.book_name, v.chapter, v.verse, v.text
-        FROM verses v
-        JOIN books b ON v.book_id = b.book_id
-        ORDER BY RANDOM()
-        LIMIT 1
-    '''
-    cursor.execute(query)
-    result = cursor.fetchone()
-    conn.close()
-    return result
+@cached(scripture_cache, search_ids_key)
+def search_verse_ids(keyword, limit=MAX_RESULT_IDS):
+    ids, suggestion = verse_search.search_with_suggestion(keyword, limit, ids_only=True)
+    return array('I', ids), suggestion
+
 
+def get_random_verse(mode="all", topic=None):
+    return random_verses.random_verse(mode, topic)
 
+
+@cached(scripture_cache, reference_key)
 def get_specific_verse(book_name, chapter, verse):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    book_id = resolve_book(book_name)
+    if book_id is None:
+        return None
+    if scripture_file:
+        return scripture_file.get_verse(book_id, chapter, verse)
     query = '''
-        SELECT b.book_name, v.chapter, v.verse, v.text
+        SELECT v.chapter, v.verse, v.text
         FROM verses v
-        JOIN books b ON v.book_id = b.book_id
-        WHERE b.book_name LIKE ? AND v.chapter = ? AND v.verse = ?
+        WHERE v.book_id = ? AND v.chapter = ? AND v.verse = ?
     '''
-    cursor.execute(query, (f'%{book_name}%', chapter, verse))
-    result = cursor.fetchone()
-    conn.close()
-    return result
+    result = db.fetchone(query, (book_id, chapter, verse))
+    return (canonical_book_name(book_id),) + result if result else None
 
 
+@cached(scripture_cache, reference_key)
 def get_chapter(book_name, chapter):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    book_id = resolve_book(book_name)
+    if book_id is None:
+        return []
+    if scripture_file:
+        return scripture_file.get_chapter(book_id, chapter)
     query = '''
         SELECT v.verse, v.text
         FROM verses v
-        JOIN books b ON v.book_id = b.book_id
-        WHERE b.book_name LIKE ? AND v.chapter = ?
+        WHERE v.book_id = ? AND v.chapter = ?
         ORDER BY v.verse
     '''
-    cursor.execute(query, (f'%{book_name}%', chapter))
-    results = cursor.fetchall()
-    conn.close()
-    return results
+    return db.fetchall(query, (book_id, chapter))
+
 
+@cached(scripture_cache, passage_key)
+def get_passage(text):
+    ranges = parse_passage(text, get_book_resolver(DB_PATH))
+    with db.reader() as conn:
+        passage = fetch_passage(conn.cursor(), ranges)
+    return [(canonical_book_name(r.book_id), r, rows) for r, rows in passage]
 
-def search_by_book(book_name, limit=10):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+
+@cached(scripture_cache, reference_key)
+def get_book_verse_ids(book_name):
+    book_id = resolve_book(book_name)
+    if book_id is None:
+        return None, array('I')
     query = '''
-        SELECT b.book_name, v.chapter, v.verse, v.text
+        SELECT v.id
+        FROM verses v
+        WHERE v.book_id = ?
+        ORDER BY v.chapter, v.verse
+    '''
+    ids = array('I', (row[0] for row in db.fetchall(query, (book_id,))))
+    return canonical_book_name(book_id), ids
+
+
+def get_verses_by_ids(ids):
+    # Primary-key fetch of one page, returned in the order of ids.
+    if not ids:
+        return []
+    query = f'''
+        SELECT v.id, b.book_name, v.chapter, v.verse, v.text
         FROM verses v
         JOIN books b ON v.book_id = b.book_id
-        WHERE b.book_name LIKE ?
-        LIMIT ?
+        WHERE v.id IN ({",".join("?" * len(ids))})
     '''
-    cursor.execute(query, (f'%{book_name}%', limit))
-    results = cursor.fetchall()
-    conn.close()
-    return results
+    rows = {row[0]: row[1:] for row in db.fetchall(query, list(ids))}
+    return [rows[verse_id] for verse_id in ids if verse_id in rows]
 
 
+@cached(scripture_cache, no_key)
 def get_all_books():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT book_name, testament FROM books ORDER BY book_id")
-    results = cursor.fetchall()
-    conn.close()
-    return results
-
-
-def get_verse_of_the_day():
-    today = date.today()
-    seed = today.year * 10000 + today.month * 100 + today.day
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM verses")
-    total = cursor.fetchone()[0]
-    random.seed(seed)
-    verse_id = random.randint(1, total)
+    return db.fetchall("SELECT book_name, testament FROM books ORDER BY book_id")
+
+
+def lookup_verse_of_the_day(day):
+    if scripture_file:
+        reference = db.fetchone("SELECT book_id, chapter, verse FROM votd_calendar WHERE day = ?", (day.isoformat(),))
+        return scripture_file.get_verse(*reference) if reference else None
     query = '''
         SELECT b.book_name, v.chapter, v.verse, v.text
-        FROM verses v
+        FROM votd_calendar c
+        JOIN verses v ON v.book_id = c.book_id AND v.chapter = c.chapter AND v.verse = c.verse
         JOIN books b ON v.book_id = b.book_id
-        WHERE v.id = ?
+        WHERE c.day = ?
     '''
-    cursor.execute(query, (verse_id,))
-    result = cursor.fetchone()
-    conn.close()
+    return db.fetchone(query, (day.isoformat(),))
+
+
+def extend_votd_calendar(start):
+    with db.transaction() as conn:
+        return extend_calendar(conn.cursor(), start, CALENDAR_DAYS)
+
+
+@cached(scripture_cache, day_key)
+def get_verse_of_the_day(day=None):
+    day = day or date.today()
+    result = lookup_verse_of_the_day(day)
+    if result is None and extend_votd_calendar(day):
+        result = lookup_verse_of_the_day(day)
     return result
 
 
+@cached(scripture_cache, votd_message_key)
+def render_votd_message(variant, day=None):
+    verse = get_verse_of_the_day(day)
+    if not verse:
+        return None
+    book, chapter, verse_num, text = verse
+    return templates.VOTD[variant].render(
+        date=(day or date.today()).strftime("%B %d, %Y"),
+        reference=f"{book} {chapter}:{verse_num}",
+        text=text,
+    )
+
+
+@cached(scripture_cache, no_key)
 def get_all_topics():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT DISTINCT topic_name FROM topics ORDER BY topic_name")
-    results = cursor.fetchall()
-    conn.close()
+    results = db.fetchall("SELECT DISTINCT topic_name FROM topics ORDER BY topic_name")
     return [r[0] for r in results]
 
 
+@cached(scripture_cache, no_key)
+def get_topic_titles():
+    return ", ".join(topic.title() for topic in get_all_topics())
+
+
+@cached(scripture_cache, no_key)
+def render_topics_message():
+    lines = (templates.TOPIC_LINE.render(number=i, topic=topic.title()) for i, topic in enumerate(get_all_topics(), 1))
+    return templates.TOPICS.render(topics=templates.join(lines))
+
+
+@cached(scripture_cache, no_key)
+def render_books_message():
+    books = get_all_books()
+    old_testament = [b[0] for b in books if b[1] == "Old"]
+    new_testament = [b[0] for b in books if b[1] == "New"]
+    return templates.BOOKS.render(
+        old_first=", ".join(old_testament[:20]),
+        old_rest=", ".join(old_testament[20:]),
+        new=", ".join(new_testament),
+    )
+
+
+@cached(scripture_cache, topic_key)
 def get_verses_by_topic(topic_name, limit=5):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
     query = '''
         SELECT b.book_name, t.chapter, t.verse, v.text
         FROM topics t
@@ -265,10 +438,122 @@ def get_verses_by_topic(topic_name, limit=5):
         WHERE t.topic_name = ?
         LIMIT ?
     '''
-    cursor.execute(query, (topic_name.lower(), limit))
-    results = cursor.fetchall()
-    conn.close()
-    return results
+    return db.fetchall(query, (topic_name.lower(), limit))
+
+
+@cached(scripture_cache, search_key)
+def get_inline_verses(text):
+    # Verses for a partly typed inline query, from the prefix index suggestions.
+    if not text:
+        votd = get_verse_of_the_day()
+        return [votd] if votd else []
+    verses = []
+    for suggestion in inline_index.suggest(text):
+        if suggestion[0] == "verse":
+            _, book_id, chapter, verse = suggestion
+            verses.append(get_specific_verse(inline_index.book_name(book_id), chapter, verse))
+        elif suggestion[0] == "topic":
+            verses.extend(get_verses_by_topic(suggestion[1]))
+        else:
+            verses.extend(search_bible(suggestion[1], INLINE_RESULT_LIMIT))
+    unique = {}
+    for verse in verses:
+        if verse:
+            unique.setdefault(tuple(verse[:3]), verse)
+    return list(unique.values())[:INLINE_RESULT_LIMIT]
+
+
+def inline_article(verse):
+    book, chapter, verse_num, text = verse
+    reference = f"{book} {chapter}:{verse_num}"
+    return InlineQueryResultArticle(
+        id=reference,
+        title=reference,
+        description=text,
+        input_message_content=InputTextMessageContent(
+            templates.VERSE.render(reference=reference, text=text), parse_mode=PARSE_MODE
+        ),
+    )
+
+
+async def coalesced(key, func, *args):
+    # Identical lookups arriving together run once on the database pool and share the result.
+    return await single_flight.do(key, lambda: db.run(func, *args))
+
+
+async def reply_in_chunks(update, blocks):
+    # Blocks render lazily and are packed into ordered, size-bounded Markdown messages.
+    async def reply(text):
+        await update.message.reply_text(text, parse_mode=PARSE_MODE)
+    return await send_chunks(reply, pack_messages(blocks, MESSAGE_LIMIT), CHUNK_PACING)
+
+
+@cached(scripture_cache, verse_block_key)
+def render_verse_block(book, chapter, verse, text):
+    return templates.VERSE_BLOCK.render(reference=f"{book} {chapter}:{verse}", text=text)
+
+
+def verse_blocks(results):
+    for verse in results:
+        yield render_verse_block(*verse)
+
+
+def search_title(keyword, ids, suggestion):
+    title = ""
+    if suggestion:
+        title = templates.DID_YOU_MEAN.render(suggestion=suggestion)
+        keyword = suggestion
+    count = f"{len(ids)}+" if len(ids) >= MAX_RESULT_IDS else len(ids)
+    return title + templates.SEARCH_TITLE.render(count=count, keyword=keyword)
+
+
+def store_result_set(key, title, ids, page_size):
+    # The token is derived from the lookup key, so everyone paging the same query shares one entry.
+    token = hashlib.blake2b(repr(key).encode(), digest_size=6).hexdigest()
+    result_sets.set(token, (title, ids, page_size))
+    return token
+
+
+def page_keyboard(token, page, pages):
+    buttons = []
+    if page > 0:
+        buttons.append(InlineKeyboardButton("⬅️ Prev", callback_data=f"page:{token}:{page - 1}"))
+    if page < pages - 1:
+        buttons.append(InlineKeyboardButton("Next ➡️", callback_data=f"page:{token}:{page + 1}"))
+    return InlineKeyboardMarkup([buttons]) if buttons else None
+
+
+def render_result_page(token, page):
+    # Returns (text, keyboard), or (None, None) once the result set has expired.
+    found, entry = result_sets.get(token)
+    if not found:
+        return None, None
+    title, ids, page_size = entry
+    pages = max(1, -(-len(ids) // page_size))
+    page = min(max(page, 0), pages - 1)
+    start = page * page_size
+    verses = get_verses_by_ids(ids[start:start + page_size])
+    text = title
+    if pages > 1:
+        text += templates.PAGE_NUMBER.render(page=page + 1, pages=pages)
+    text += "".join(verse_blocks(verses))
+    return text.strip(), page_keyboard(token, page, pages)
+
+
+async def reply_with_pages(update, key, title, ids, page_size):
+    token = store_result_set(key, title, ids, page_size)
+    text, keyboard = await db.run(render_result_page, token, 0)
+    await update.message.reply_text(text, parse_mode=PARSE_MODE, reply_markup=keyboard)
+
+
+async def reply_with_search(update, keyword):
+    hot_queries.record("search", normalize_query_key(keyword))
+    key = ("search",) + search_ids_key(keyword)
+    ids, suggestion = await coalesced(key, search_verse_ids, keyword)
+    if not ids:
+        await update.message.reply_text(f"❌ No verses found for '{keyword}'")
+        return
+    await reply_with_pages(update, key, search_title(keyword, ids, suggestion), ids, SEARCH_PAGE_SIZE)
 
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -281,71 +566,16 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     else:
         sub_status = "❌ Not subscribed yet"
     
-    welcome = f"""
-🙏 *Welcome to Bible Bot!*
-
-{sub_status}
-
-*📚 Commands:*
-
-*Search:*
-/search <word> - Search for verses
-/topic <topic> - Search by topic
-/topics - List all topics
-
-*Get Verses:*
-/verse John 3:16 - Get specific verse
-/chapter Psalm 23 - Get full chapter
-/book Romans - Browse a book
-/books - List all 66 books
-
-*Daily:*
-/votd - Verse of the Day
-/random - Random verse
-/subscribe - Get daily verses at 6 AM
-/unsubscribe - Stop daily verses
-/settimezone - Set your timezone
-/mystatus - Check subscription
-
-/help - Show all commands
-"""
-    await update.message.reply_text(welcome, parse_mode='Markdown')
+    welcome = templates.WELCOME.render(status=sub_status)
+    await update.message.reply_text(welcome, parse_mode=PARSE_MODE)
 
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    help_text = """
-📖 *Bible Bot Help*
-
-*🔍 Search Commands:*
-/search <word> - Search all verses
-/topic <topic> - Search by topic
-/topics - See all topics
-
-*📍 Get Specific Verses:*
-/verse John 3:16
-/verse Genesis 1:1
-
-*📄 Get Chapters:*
-/chapter John 3
-/chapter Psalm 23
-
-*📚 Browse:*
-/book Romans
-/books - List all 66 books
+    await update.message.reply_text(templates.HELP_MESSAGE, parse_mode=PARSE_MODE)
 
-*🌅 Daily Verses:*
-/votd - Verse of the Day
-/random - Random verse
-/subscribe - Auto daily verse at 6 AM
-/unsubscribe - Stop daily verses
-/settimezone - Set your timezone
-/mystatus - Check subscription
-/testdaily - Test daily verse
 
-*💡 Topics:*
-salvation, love, faith, prayer, hope, peace, strength, forgiveness, fear, healing, wisdom, anxiety, joy
-"""
-    await update.message.reply_text(help_text, parse_mode='Markdown')
+def timezone_options():
+    return templates.join(templates.TIMEZONE_LINE.render(key=key, name=name) for key, (name, _) in TIMEZONE_OPTIONS.items())
 
 
 async def settimezone_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -357,30 +587,20 @@ async def settimezone_command(update: Update, context: ContextTypes.DEFAULT_TYPE
             tz_name, tz_value = TIMEZONE_OPTIONS[choice]
             
             if is_subscribed(chat_id):
-                update_subscriber_timezone(chat_id, tz_value)
+                await db.run(update_subscriber_timezone, chat_id, tz_value)
+                await schedule_daily_verses(context.job_queue)
                 await update.message.reply_text(
-                    f"✅ *Timezone updated!*\n\n"
-                    f"🌍 {tz_name}\n"
-                    f"⏰ You'll receive daily verses at 6:00 AM your local time!",
-                    parse_mode='Markdown'
+                    templates.TIMEZONE_UPDATED.render(timezone=tz_name), parse_mode=PARSE_MODE
                 )
             else:
                 context.user_data['timezone'] = tz_value
                 await update.message.reply_text(
-                    f"✅ *Timezone set!*\n\n"
-                    f"🌍 {tz_name}\n\n"
-                    f"Now use /subscribe to receive daily verses at 6 AM!",
-                    parse_mode='Markdown'
+                    templates.TIMEZONE_SET.render(timezone=tz_name), parse_mode=PARSE_MODE
                 )
             return
     
-    response = "🌍 *Select Your Timezone*\n\n"
-    for key, (name, _) in TIMEZONE_OPTIONS.items():
-        response += f"{key}. {name}\n"
-    response += "\n*Usage:* /settimezone <number>\n"
-    response += "*Example:* /settimezone 1"
-    
-    await update.message.reply_text(response, parse_mode='Markdown')
+    response = templates.TIMEZONE_MENU.render(options=timezone_options())
+    await update.message.reply_text(response, parse_mode=PARSE_MODE)
 
 
 async def subscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -403,16 +623,12 @@ async def subscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     timezone = context.user_data.get('timezone', None)
     
     if not timezone:
-        response = "🌍 *Please set your timezone first!*\n\n"
-        for key, (name, _) in TIMEZONE_OPTIONS.items():
-            response += f"{key}. {name}\n"
-        response += "\n*Usage:* /settimezone <number>\n"
-        response += "*Example:* /settimezone 1\n\n"
-        response += "Then use /subscribe again!"
-        await update.message.reply_text(response, parse_mode='Markdown')
+        response = templates.TIMEZONE_FIRST.render(options=timezone_options())
+        await update.message.reply_text(response, parse_mode=PARSE_MODE)
         return
     
-    if add_subscriber(chat_id, username, first_name, timezone):
+    if await db.run(add_subscriber, chat_id, username, first_name, timezone):
+        await schedule_daily_verses(context.job_queue)
         total = get_subscriber_count()
         tz_display = timezone
         for key, (name, value) in TIMEZONE_OPTIONS.items():
@@ -421,14 +637,7 @@ async def subscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 break
         
         await update.message.reply_text(
-            f"🎉 *Successfully subscribed!*\n\n"
-            f"🌍 Timezone: {tz_display}\n"
-            f"⏰ Daily verse at 6:00 AM your local time!\n\n"
-            f"👥 Total subscribers: {total}\n\n"
-            f"Use /settimezone to change timezone\n"
-            f"Use /unsubscribe to stop\n"
-            f"Use /votd to get today's verse now!",
-            parse_mode='Markdown'
+            templates.SUBSCRIBED.render(timezone=tz_display, total=total), parse_mode=PARSE_MODE
         )
     else:
         await update.message.reply_text("❌ Failed to subscribe. Please try again.")
@@ -444,13 +653,8 @@ async def unsubscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         )
         return
     
-    if remove_subscriber(chat_id):
-        await update.message.reply_text(
-            "👋 *Successfully unsubscribed*\n\n"
-            "You will no longer receive daily verses.\n\n"
-            "Use /subscribe anytime to start again!",
-            parse_mode='Markdown'
-        )
+    if await db.run(remove_subscriber, chat_id):
+        await update.message.reply_text(templates.UNSUBSCRIBED_MESSAGE, parse_mode=PARSE_MODE)
     else:
         await update.message.reply_text("❌ Failed to unsubscribe. Please try again.")
 
@@ -467,22 +671,13 @@ async def mystatus_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 tz_display = name
                 break
         
-        response = (
-            f"✅ *You are subscribed!*\n\n"
-            f"🌍 Timezone: {tz_display}\n"
-            f"⏰ Daily verse: 6:00 AM your local time\n"
-            f"👥 Total subscribers: {total}\n\n"
-            f"Use /settimezone to change timezone\n"
-            f"Use /unsubscribe to stop."
-        )
+        today = local_date(tz, datetime.now(pytz.UTC)).isoformat()
+        delivered = "✅ delivered" if await db.run(delivery_ledger.was_delivered, chat_id, today) else "⏳ not yet"
+        response = templates.STATUS_SUBSCRIBED.render(timezone=tz_display, delivered=delivered, total=total)
     else:
-        response = (
-            "❌ *You are not subscribed*\n\n"
-            "Use /settimezone to set your timezone\n"
-            "Then /subscribe to get daily verses at 6 AM!"
-        )
+        response = templates.STATUS_NOT_SUBSCRIBED_MESSAGE
     
-    await update.message.reply_text(response, parse_mode='Markdown')
+    await update.message.reply_text(response, parse_mode=PARSE_MODE)
 
 
 async def testdaily_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -494,128 +689,134 @@ async def testdaily_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     tz_str = get_subscriber_timezone(chat_id)
     
-    try:
-        tz = pytz.timezone(tz_str) if tz_str else pytz.UTC
-        user_time = datetime.now(tz)
-    except:
-        tz = pytz.UTC
-        user_time = datetime.now(tz)
+    user_time = datetime.now(get_timezone(tz_str))
     
     await update.message.reply_text(
-        f"🔍 *Debug Info:*\n\n"
-        f"📍 Your timezone: `{tz_str}`\n"
-        f"🕐 Your local time: `{user_time.strftime('%H:%M:%S')}`\n"
-        f"📅 Your local date: `{user_time.strftime('%Y-%m-%d')}`\n\n"
-        f"Sending test verse now...",
-        parse_mode='Markdown'
+        templates.DEBUG_INFO.render(
+            timezone=tz_str, time=user_time.strftime('%H:%M:%S'), date=user_time.strftime('%Y-%m-%d')
+        ),
+        parse_mode=PARSE_MODE
     )
     
-    verse = get_verse_of_the_day()
-    if verse:
-        book, chapter, verse_num, text = verse
-        today = date.today().strftime("%B %d, %Y")
-        message = f"🌅 *Test Daily Verse*\n"
-        message += f"📅 _{today}_\n\n"
-        message += f"📖 *{book} {chapter}:{verse_num}*\n\n"
-        message += f"_{text}_\n\n"
-        message += "🙏 Have a blessed day!"
-        await update.message.reply_text(message, parse_mode='Markdown')
+    message = await coalesced(("votd",) + votd_message_key("test"), render_votd_message, "test")
+    if message:
+        await update.message.reply_text(message, parse_mode=PARSE_MODE)
     else:
         await update.message.reply_text("❌ Could not get verse.")
 
 
 async def votd_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    verse = get_verse_of_the_day()
-    if verse:
-        book, chapter, verse_num, text = verse
-        today = date.today().strftime("%B %d, %Y")
-        response = f"🌅 *Verse of the Day*\n📅 _{today}_\n\n📖 *{book} {chapter}:{verse_num}*\n\n_{text}_\n\n🙏 Have a blessed day!"
-    else:
-        response = "❌ Could not get verse of the day."
-    await update.message.reply_text(response, parse_mode='Markdown')
+    response = await coalesced(("votd",) + votd_message_key("votd"), render_votd_message, "votd")
+    if not response:
+        await update.message.reply_text("❌ Could not get verse of the day.")
+        return
+    await update.message.reply_text(response, parse_mode=PARSE_MODE)
 
 
 async def random_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    verse = get_random_verse()
+    # /random, /random nt, /random wisdom, or /random <topic>.
+    mode = "all"
+    topic = None
+    if context.args:
+        choice = ' '.join(context.args).lower()
+        if choice in RANDOM_MODES:
+            mode = choice
+        else:
+            topic = choice[len("topic "):] if choice.startswith("topic ") else choice
+    verse = await db.run(get_random_verse, mode, topic)
     if verse:
         book, chapter, verse_num, text = verse
-        response = f"🎲 *Random Verse*\n\n📖 *{book} {chapter}:{verse_num}*\n\n_{text}_"
+        response = templates.RANDOM_VERSE.render(reference=f"{book} {chapter}:{verse_num}", text=text)
+        await update.message.reply_text(response, parse_mode=PARSE_MODE)
+    elif topic:
+        await update.message.reply_text(
+            f"❌ No verses for topic '{topic}'.\n\nTry /random, /random nt, /random ot, /random wisdom or /topics."
+        )
     else:
-        response = "❌ Could not get a random verse."
-    await update.message.reply_text(response, parse_mode='Markdown')
+        await update.message.reply_text("❌ Could not get a random verse.")
 
 
 async def search_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not context.args:
         await update.message.reply_text("Please provide a word to search.\n\nExample: /search love")
         return
-    keyword = ' '.join(context.args)
-    results = search_bible(keyword)
-    if not results:
-        await update.message.reply_text(f"❌ No verses found for '{keyword}'")
-        return
-    response = f"🔍 *Found {len(results)} verse(s) for '{keyword}':*\n\n"
-    for book, chapter, verse, text in results:
-        response += f"📖 *{book} {chapter}:{verse}*\n_{text}_\n\n"
-    await update.message.reply_text(response, parse_mode='Markdown')
+    await reply_with_search(update, ' '.join(context.args))
 
 
 async def topics_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    topics = get_all_topics()
-    response = "📚 *Available Topics:*\n\n"
-    for i, topic in enumerate(topics, 1):
-        response += f"{i}. {topic.title()}\n"
-    response += "\n*Usage:* /topic <name>\n*Example:* /topic salvation"
-    await update.message.reply_text(response, parse_mode='Markdown')
+    response = await db.run(render_topics_message)
+    await update.message.reply_text(response, parse_mode=PARSE_MODE)
 
 
 async def topic_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not context.args:
-        topics = get_all_topics()
-        response = "Please provide a topic name.\n\n*Available topics:*\n"
-        response += ", ".join([t.title() for t in topics])
-        response += "\n\n*Example:* /topic salvation"
-        await update.message.reply_text(response, parse_mode='Markdown')
+        topics = await db.run(get_topic_titles)
+        response = templates.TOPIC_PROMPT.render(topics=topics)
+        await update.message.reply_text(response, parse_mode=PARSE_MODE)
         return
     topic_name = ' '.join(context.args).lower()
-    results = get_verses_by_topic(topic_name)
+    hot_queries.record("topic", topic_name)
+    results = await coalesced(("topic",) + topic_key(topic_name), get_verses_by_topic, topic_name)
     if not results:
-        topics = get_all_topics()
-        response = f"❌ Topic '{topic_name}' not found.\n\n*Available topics:*\n"
-        response += ", ".join([t.title() for t in topics])
-        await update.message.reply_text(response, parse_mode='Markdown')
+        topics = await db.run(get_topic_titles)
+        response = templates.TOPIC_NOT_FOUND.render(topic=topic_name, topics=topics)
+        await update.message.reply_text(response, parse_mode=PARSE_MODE)
         return
-    response = f"📚 *Topic: {topic_name.title()}*\n\n"
-    for book, chapter, verse, text in results:
-        response += f"📖 *{book} {chapter}:{verse}*\n_{text}_\n\n"
-    await update.message.reply_text(response, parse_mode='Markdown')
+    header = templates.TOPIC_TITLE.render(topic=topic_name.title())
+    await reply_in_chunks(update, itertools.chain([header], verse_blocks(results)))
 
 
 async def verse_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    usage = (
+        "Please use format: /verse Book Chapter:Verse\n\n"
+        "Examples:\n"
+        "/verse John 3:16\n"
+        "/verse John 3:16-18\n"
+        "/verse Rom 8:28,38-39\n"
+        "/verse Gen 1:1-2:3\n"
+        "/verse Ps 23; Ps 91:1"
+    )
     if not context.args:
-        await update.message.reply_text("Please provide book, chapter and verse.\n\nExample: /verse John 3:16")
+        await update.message.reply_text(usage)
         return
     text = ' '.join(context.args)
     try:
-        if ':' not in text:
-            await update.message.reply_text("Please use format: /verse Book Chapter:Verse")
-            return
-        parts = text.rsplit(' ', 1)
-        book_name = parts[0]
-        chapter_verse = parts[1]
-        chapter, verse = chapter_verse.split(':')
-        chapter = int(chapter)
-        verse = int(verse)
-    except:
-        await update.message.reply_text("Please use format: /verse Book Chapter:Verse")
+        passage = await coalesced(("passage", passage_key(text)), get_passage, text)
+    except PassageError as e:
+        await update.message.reply_text(f"❌ {e}\n\n{usage}")
         return
-    result = get_specific_verse(book_name, chapter, verse)
-    if result:
-        book, chap, ver, text = result
-        response = f"📖 *{book} {chap}:{ver}*\n\n_{text}_"
-    else:
-        response = f"❌ Verse not found: {book_name} {chapter}:{verse}"
-    await update.message.reply_text(response, parse_mode='Markdown')
+    hot_queries.record("passage", passage_key(text))
+    
+    if len(passage) == 1 and len(passage[0][2]) == 1:
+        book, _, rows = passage[0]
+        chap, ver, verse_text = rows[0]
+        await update.message.reply_text(
+            templates.VERSE.render(reference=f"{book} {chap}:{ver}", text=verse_text), parse_mode=PARSE_MODE
+        )
+        return
+    
+    blocks = []
+    shown = 0
+    total = sum(len(rows) for _, _, rows in passage)
+    for book, reference_range, rows in passage:
+        if not rows:
+            reference = f"{book} {reference_range.start_chapter}:{reference_range.start_verse}"
+            blocks.append(templates.PASSAGE_NOT_FOUND.render(reference=reference))
+            continue
+        rows = rows[:MAX_PASSAGE_VERSES - shown]
+        if not rows:
+            break
+        blocks.append(templates.PASSAGE_TITLE.render(reference=format_range(book, rows)))
+        for chap, ver, verse_text in rows:
+            blocks.append(templates.NUMBERED_VERSE.render(verse=ver, text=verse_text))
+        blocks.append("\n")
+        shown += len(rows)
+    if total > shown:
+        blocks.append(templates.PASSAGE_TRUNCATED.render(shown=shown, total=total))
+    if not shown:
+        await update.message.reply_text(f"❌ Verse not found: {text}")
+        return
+    await reply_in_chunks(update, blocks)
 
 
 async def chapter_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -630,16 +831,17 @@ async def chapter_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except:
         await update.message.reply_text("Please use format: /chapter Book Chapter")
         return
-    results = get_chapter(book_name, chapter)
+    if not 0 < chapter <= MAX_REFERENCE_NUMBER:
+        await update.message.reply_text(f"❌ Chapter not found: {book_name} {chapter}")
+        return
+    hot_queries.record("chapter", *reference_key(book_name, chapter))
+    results = await coalesced(("chapter",) + reference_key(book_name, chapter), get_chapter, book_name, chapter)
     if not results:
         await update.message.reply_text(f"❌ Chapter not found: {book_name} {chapter}")
         return
-    response = f"📖 *{book_name.title()} Chapter {chapter}*\n\n"
-    for verse_num, text in results[:30]:
-        response += f"*{verse_num}.* {text}\n\n"
-    if len(results) > 30:
-        response += f"_(Showing 30 of {len(results)} verses)_"
-    await update.message.reply_text(response, parse_mode='Markdown')
+    header = templates.CHAPTER_TITLE.render(book=canonical_book_name(resolve_book(book_name)), chapter=chapter)
+    verses = (templates.CHAPTER_VERSE.render(verse=verse_num, text=text) for verse_num, text in results)
+    await reply_in_chunks(update, itertools.chain([header], verses))
 
 
 async def book_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -647,94 +849,225 @@ async def book_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Please provide a book name.\n\nExample: /book John")
         return
     book_name = ' '.join(context.args)
-    results = search_by_book(book_name)
-    if not results:
+    key = ("book",) + reference_key(book_name)
+    name, ids = await coalesced(key, get_book_verse_ids, book_name)
+    if not ids:
         await update.message.reply_text(f"❌ Book not found: {book_name}\n\nUse /books to see all books.")
         return
-    response = f"📚 *Verses from {book_name.title()}:*\n\n"
-    for book, chapter, verse, text in results:
-        response += f"📖 *{book} {chapter}:{verse}*\n_{text}_\n\n"
-    await update.message.reply_text(response, parse_mode='Markdown')
+    await reply_with_pages(update, key, templates.BOOK_TITLE.render(book=name), ids, BOOK_PAGE_SIZE)
 
 
 async def books_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    books = get_all_books()
-    old_testament = [b[0] for b in books if b[1] == "Old"]
-    new_testament = [b[0] for b in books if b[1] == "New"]
-    response = "📚 *Bible Books*\n\n*Old Testament (39):*\n"
-    response += ", ".join(old_testament[:20]) + "\n" + ", ".join(old_testament[20:]) + "\n\n"
-    response += "*New Testament (27):*\n" + ", ".join(new_testament)
-    await update.message.reply_text(response, parse_mode='Markdown')
+    response = await db.run(render_books_message)
+    await update.message.reply_text(response, parse_mode=PARSE_MODE)
 
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     keyword = update.message.text.strip()
     if not keyword:
         return
-    results = search_bible(keyword)
-    if not results:
-        await update.message.reply_text(f"❌ No verses found for '{keyword}'")
+    await reply_with_search(update, keyword)
+
+
+async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    text = " ".join(update.inline_query.query.split())
+    verses = await coalesced(("inline",) + search_key(text), get_inline_verses, text)
+    await update.inline_query.answer(
+        [inline_article(verse) for verse in verses],
+        cache_time=INLINE_CACHE_SECONDS,
+        is_personal=False,
+    )
+
+
+async def page_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    try:
+        _, token, page = query.data.split(":")
+        page = int(page)
+    except ValueError:
+        await query.answer()
+        return
+    text, keyboard = await db.run(render_result_page, token, page)
+    if text is None:
+        await query.answer("⌛ These results have expired. Please search again.", show_alert=True)
         return
-    response = f"🔍 *Found {len(results)} verse(s) for '{keyword}':*\n\n"
-    for book, chapter, verse, text in results:
-        response += f"📖 *{book} {chapter}:{verse}*\n_{text}_\n\n"
-    await update.message.reply_text(response, parse_mode='Markdown')
+    await query.answer()
+    await query.edit_message_text(text, parse_mode=PARSE_MODE, reply_markup=keyboard)
 
 
-async def check_and_send_daily_verses(context: ContextTypes.DEFAULT_TYPE):
-    print(f"⏰ Hourly check running at {datetime.now(pytz.UTC).strftime('%Y-%m-%d %H:%M:%S')} UTC", flush=True)
-    
-    subscribers = get_all_subscribers()
-    
-    if not subscribers:
-        print("📭 No subscribers found", flush=True)
+def warm_up(deadline):
+    start = time.monotonic()
+    try:
+        warmed_bytes = warm_page_cache(DB_PATH, deadline)
+        get_all_books()
+        get_all_topics()
+        loaders = {
+            "search": search_verse_ids,
+            "topic": get_verses_by_topic,
+            "passage": get_passage,
+            "chapter": get_chapter,
+        }
+        warmed = warm_caches(hot_queries.top(WARMUP_QUERY_LIMIT), loaders, deadline)
+    except Exception as e:
+        print(f"⚠️ Warm-up stopped: {e}", flush=True)
         return
-    
-    print(f"👥 Checking {len(subscribers)} subscribers...", flush=True)
-    
-    verse = get_verse_of_the_day()
-    if not verse:
-        print("❌ Could not get verse for daily send", flush=True)
+    print(
+        f"🔥 Warmed {warmed_bytes // 1024} KB of {DB_PATH} and {warmed} hot queries "
+        f"in {time.monotonic() - start:.2f}s",
+        flush=True
+    )
+
+
+async def save_hot_queries(context: ContextTypes.DEFAULT_TYPE):
+    try:
+        hot_queries.save()
+    except OSError as e:
+        print(f"⚠️ Could not save hot queries: {e}", flush=True)
+
+
+def load_scripture_indexes():
+    # Slow (the memory backend reads every verse), so it runs off the event loop.
+    scripture_cache.clear()
+    reset_book_resolvers()
+    return (
+        create_search_engine(SEARCH_BACKEND, DB_PATH),
+        InlineIndex.from_database(DB_PATH, get_all_topics()),
+        RandomVersePool(DB_PATH),
+        open_scripture_file(SCRIPTURE_FILE),
+    )
+
+
+async def check_scripture_version(context: ContextTypes.DEFAULT_TYPE):
+    global scripture_version, verse_search, inline_index, scripture_file, random_verses
+    version = await db.run(get_scripture_version)
+    if version == scripture_version:
         return
-    
-    book, chapter, verse_num, text = verse
-    today = date.today().strftime("%B %d, %Y")
-    
-    message = f"🌅 *Good Morning! Daily Verse*\n"
-    message += f"📅 _{today}_\n\n"
-    message += f"📖 *{book} {chapter}:{verse_num}*\n\n"
-    message += f"_{text}_\n\n"
-    message += "🙏 Have a blessed day!\n\n"
-    message += "_Reply /unsubscribe to stop daily verses_"
-    
-    sent_count = 0
-    
-    for chat_id, timezone_str in subscribers:
+    loaded = await asyncio.get_running_loop().run_in_executor(None, load_scripture_indexes)
+    verse_search, inline_index, random_verses, scripture_file = loaded
+    # Again after the swap: lookups made while loading may have cached results from the old engines.
+    scripture_cache.clear()
+    result_sets.clear()
+    scripture_version = version
+    print(f"🔄 Scripture re-imported ({version}), caches cleared", flush=True)
+
+
+def next_daily_delay(min_delay=0):
+    # Seconds until the earliest next send or delivery retry.
+    try:
+        due_times = [t for t in (get_next_send_at(), delivery_ledger.next_attempt_at()) if t is not None]
+        delay = min(due_times) - time.time() if due_times else DAILY_MAX_SLEEP
+        return min(max(delay, min_delay), DAILY_MAX_SLEEP)
+    except sqlite3.Error as e:
+        # e.g. "database is locked" during a re-import; look again shortly.
+        print(f"⚠️ Could not read the next send time: {e}", flush=True)
+        return DAILY_RETRY_DELAY
+
+
+def set_daily_wakeup(job_queue, delay):
+    # One pending wakeup at a time; rescheduled whenever the next due time may change.
+    for job in job_queue.get_jobs_by_name(DAILY_JOB_NAME):
+        job.schedule_removal()
+    job_queue.run_once(send_due_daily_verses, when=delay, name=DAILY_JOB_NAME)
+
+
+async def schedule_daily_verses(job_queue, min_delay=0):
+    delay = await db.run(next_daily_delay, min_delay)
+    set_daily_wakeup(job_queue, delay)
+    return delay
+
+
+async def enqueue_due_deliveries(now):
+    now_ts = int(now.timestamp())
+    enqueued = 0
+    skipped = 0
+    pages = iter_subscriber_pages(due_before=now_ts)
+    while True:
+        page = await db.run(next, pages, None)
+        if page is None:
+            break
+        deliveries = []
+        updates = []
+        for chat_id, timezone_str, next_send_at in page:
+            # Advance from now rather than from the missed slot, so downtime never queues repeats.
+            updates.append((next_send_timestamp(timezone_str, now), chat_id))
+            if now_ts - next_send_at > DAILY_SEND_GRACE:
+                continue
+            scheduled = datetime.fromtimestamp(next_send_at, pytz.UTC)
+            deliveries.append((chat_id, local_date(timezone_str, scheduled).isoformat()))
+        await db.run(delivery_ledger.enqueue, deliveries, updates, now_ts)
+        enqueued += len(deliveries)
+        skipped += len(updates) - len(deliveries)
+    return enqueued, skipped
+
+
+def delivery_messages(pending, messages):
+    # messages: local date -> rendered daily verse, prepared off the event loop.
+    for chat_id, day, attempts in pending:
+        message = messages.get(day)
+        if message:
+            yield chat_id, message, day, attempts
+        else:
+            print(f"❌ Could not get verse for daily send on {day}", flush=True)
+            # Only buffered here; written with the rest of the page.
+            delivery_ledger.record(chat_id, day, attempts, "failed", int(time.time()))
+
+
+async def send_due_daily_verses(context: ContextTypes.DEFAULT_TYPE):
+    if daily_send_lock.locked():
+        return
+    async with daily_send_lock:
+        min_delay = DAILY_RETRY_DELAY
         try:
-            if not timezone_str:
-                timezone_str = 'UTC'
-            
-            tz = pytz.timezone(timezone_str)
-            user_time = datetime.now(tz)
-            
-            print(f"  👤 User {chat_id}: TZ={timezone_str}, LocalTime={user_time.strftime('%H:%M')}", flush=True)
-            
-            if user_time.hour == 6:
-                await context.bot.send_message(
-                    chat_id=chat_id,
-                    text=message,
-                    parse_mode='Markdown'
-                )
-                sent_count += 1
-                print(f"  ✅ Sent to {chat_id}", flush=True)
-                
+            await run_daily_send(context)
+            min_delay = 0
         except Exception as e:
-            print(f"  ❌ Error for {chat_id}: {e}", flush=True)
-            if "blocked" in str(e).lower() or "not found" in str(e).lower():
-                remove_subscriber(chat_id)
-                print(f"  🗑️ Removed invalid subscriber: {chat_id}", flush=True)
+            print(f"❌ Daily send stopped: {e!r}", flush=True)
+        finally:
+            # Always rescheduled, so one failed run never ends daily sends.
+            delay = await schedule_daily_verses(context.job_queue, min_delay)
+            print(f"⏭️ Next daily check in {delay:.0f}s", flush=True)
+
+
+async def run_daily_send(context):
+    now = datetime.now(pytz.UTC)
+    enqueued, skipped = await enqueue_due_deliveries(now)
+    if enqueued or skipped:
+        print(
+            f"⏰ {enqueued} daily verse(s) queued at {now.strftime('%Y-%m-%d %H:%M:%S')} UTC, "
+            f"{skipped} missed while offline",
+            flush=True
+        )
+    
+    async def on_result(item, outcome):
+        chat_id, _, day, attempts = item
+        if delivery_ledger.record(chat_id, day, attempts, outcome, int(time.time())):
+            await db.run(delivery_ledger.write, delivery_ledger.take())
+        if outcome == "unreachable":
+            await db.run(remove_subscriber, chat_id)
+            print(f"  🗑️ Removed invalid subscriber: {chat_id}", flush=True)
     
-    print(f"📤 Hourly check complete: {sent_count} messages sent", flush=True)
+    # Whatever is pending, including sends interrupted by a restart and retries now due.
+    messages = {}
+    while True:
+        pending = await db.run(delivery_ledger.pending, int(now.timestamp()), DELIVERY_PAGE_SIZE)
+        if not pending:
+            break
+        # Each day's verse renders once, on the database pool, before any send starts.
+        for day in {day for _, day, _ in pending} - messages.keys():
+            messages[day] = await db.run(render_votd_message, "daily", date.fromisoformat(day))
+        broadcaster = Broadcaster(context.bot, BROADCAST_RATE, BROADCAST_CONCURRENCY)
+        result = await broadcaster.broadcast(delivery_messages(pending, messages), on_result, parse_mode=PARSE_MODE)
+        await db.run(delivery_ledger.write, delivery_ledger.take())
+        print(f"📤 Daily send: {result.summary()}", flush=True)
+    stats = scripture_cache.stats()
+    print(
+        f"📊 Cache: {stats['entries']} entries, {stats['hits']} hits, {stats['misses']} misses "
+        f"({stats['hit_rate']:.0%} hit rate), {stats['evictions']} evictions",
+        flush=True
+    )
+    print(f"🗄️ Database pool: {db.pool_stats.summary()}", flush=True)
+    print(f"🔀 Coalesced lookups (collapsed/total): {single_flight.summary()}", flush=True)
+    print(f"🗄️ Slowest queries by total time:\n{db.stats.summary()}", flush=True)
 
 
 def main():
@@ -746,9 +1079,30 @@ def main():
     print("🤖 Starting Bible Bot...", flush=True)
     print("=" * 50, flush=True)
     
-    setup_subscribers_table()
+    setup_database()
     keep_alive()
     
+    global verse_search, inline_index, scripture_version, scripture_file, random_verses
+    scripture_version = get_scripture_version()
+    verse_search = create_search_engine(SEARCH_BACKEND, DB_PATH)
+    inline_index = InlineIndex.from_database(DB_PATH, get_all_topics())
+    random_verses = RandomVersePool(DB_PATH)
+    added_days = extend_votd_calendar(date.today())
+    if added_days:
+        print(f"📅 Added {added_days} day(s) to the verse of the day calendar", flush=True)
+    scripture_file = open_scripture_file(SCRIPTURE_FILE)
+    if scripture_file:
+        print(f"🗺️ Mapped {SCRIPTURE_FILE}: {scripture_file.verse_count} verses", flush=True)
+    print(f"🔍 Search backend: {SEARCH_BACKEND}", flush=True)
+    if SEARCH_BACKEND == "fts" and not verse_search.has_fts:
+        print("⚠️ Full-text index missing, falling back to LIKE search. Re-run import_bible.py", flush=True)
+    
+    loaded = hot_queries.load()
+    print(f"🔥 Warming caches ({loaded} recorded hot queries, budget {WARMUP_BUDGET_SECONDS}s)...", flush=True)
+    # Warming runs in the background; startup waits for it at most the budget.
+    warm_thread = Thread(target=warm_up, args=(time.monotonic() + WARMUP_BUDGET_SECONDS,), daemon=True)
+    warm_thread.start()
+    
     bot_app = Application.builder().token(TOKEN).build()
     
     bot_app.add_handler(CommandHandler("start", start_command))
@@ -768,20 +1122,36 @@ def main():
     bot_app.add_handler(CommandHandler("settimezone", settimezone_command))
     bot_app.add_handler(CommandHandler("testdaily", testdaily_command))
     bot_app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
+    bot_app.add_handler(CallbackQueryHandler(page_callback, pattern=r"^page:"))
+    bot_app.add_handler(InlineQueryHandler(inline_query))
     
     job_queue = bot_app.job_queue
+    delay = next_daily_delay()
+    set_daily_wakeup(job_queue, delay)
+    print(f"📅 Daily verses scheduled, first check in {delay:.0f}s", flush=True)
+    
+    job_queue.run_repeating(
+        check_scripture_version,
+        interval=SCRIPTURE_VERSION_CHECK_INTERVAL,
+        first=SCRIPTURE_VERSION_CHECK_INTERVAL
+    )
+    
     job_queue.run_repeating(
-        check_and_send_daily_verses,
-        interval=3600,
-        first=10
+        save_hot_queries,
+        interval=HOT_QUERIES_SAVE_INTERVAL,
+        first=HOT_QUERIES_SAVE_INTERVAL
     )
-    print("📅 Hourly timezone check scheduled", flush=True)
     
-    subscriber_count = get_subscriber_count()
+    subscriber_count = subscriber_cache.load(iter_subscribers())
     print(f"👥 Current subscribers: {subscriber_count}", flush=True)
+    
+    warm_thread.join(timeout=max(0, WARMUP_BUDGET_SECONDS))
     print("✅ Bible Bot is running!", flush=True)
     
     bot_app.run_polling(drop_pending_updates=True)
+    
+    hot_queries.save()
+    close_databases()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,195 @@
+from string import Formatter
+
+
+PARSE_MODE = "MarkdownV2"
+MARKDOWN_SPECIAL = "_*[]()~`>#+-=|{}.!\\"
+# Template literals keep their *bold*, _italic_ and `code` markers; values never do.
+MARKUP_CHARS = "*_`"
+
+_ESCAPE_TABLE = str.maketrans({char: "\\" + char for char in MARKDOWN_SPECIAL})
+_LITERAL_TABLE = str.maketrans({char: "\\" + char for char in MARKDOWN_SPECIAL if char not in MARKUP_CHARS})
+
+
+class Markup(str):
+    """Text that is already MarkdownV2, so it is not escaped again."""
+
+
+def escape(value):
+    # A single str.translate pass; verse text and user input never reach Telegram unescaped.
+    if isinstance(value, Markup):
+        return value
+    return str(value).translate(_ESCAPE_TABLE)
+
+
+def join(parts, separator=""):
+    return Markup(escape(separator).join(escape(part) for part in parts))
+
+
+class Template:
+    """A message with {field} slots, compiled once into a MarkdownV2 format string."""
+
+    def __init__(self, source):
+        parts = []
+        for literal, field, _, _ in Formatter().parse(source):
+            parts.append(literal.translate(_LITERAL_TABLE).replace("{", "{{").replace("}", "}}"))
+            if field is not None:
+                parts.append("{" + field + "}")
+        self.compiled = "".join(parts)
+
+    def render(self, **values):
+        return Markup(self.compiled.format_map({name: escape(value) for name, value in values.items()}))
+
+
+WELCOME = Template("""
+🙏 *Welcome to Bible Bot!*
+
+{status}
+
+*📚 Commands:*
+
+*Search:*
+/search <word> - Search for verses
+/topic <topic> - Search by topic
+/topics - List all topics
+
+*Get Verses:*
+/verse John 3:16 - Get specific verse
+/chapter Psalm 23 - Get full chapter
+/book Romans - Browse a book
+/books - List all 66 books
+
+*Daily:*
+/votd - Verse of the Day
+/random - Random verse
+/subscribe - Get daily verses at 6 AM
+/unsubscribe - Stop daily verses
+/settimezone - Set your timezone
+/mystatus - Check subscription
+
+/help - Show all commands
+""")
+
+HELP = Template("""
+📖 *Bible Bot Help*
+
+*🔍 Search Commands:*
+/search <word> - Search all verses
+/topic <topic> - Search by topic
+/topics - See all topics
+
+*🔎 Search Syntax:*
+/search "love one another" - Exact phrase
+/search faith AND works - Both words
+/search peace OR rest - Either word
+/search love NOT hate - Exclude a word
+/search book:Romans grace - One book
+/search nt: shepherd - New Testament only (ot: for Old)
+
+*📍 Get Specific Verses:*
+/verse John 3:16
+/verse John 3:16-18
+/verse Rom 8:28,38-39
+/verse Ps 23; Ps 91:1
+
+*📄 Get Chapters:*
+/chapter John 3
+/chapter Psalm 23
+
+*📚 Browse:*
+/book Romans
+/books - List all 66 books
+
+*💬 In Any Chat:*
+Type the bot's @username, then a reference, topic or word
+
+*🌅 Daily Verses:*
+/votd - Verse of the Day
+/random - Random verse
+/random nt - Random New Testament verse (also ot, wisdom, psalms, proverbs, gospels)
+/random love - Random verse on a topic
+/subscribe - Auto daily verse at 6 AM
+/unsubscribe - Stop daily verses
+/settimezone - Set your timezone
+/mystatus - Check subscription
+/testdaily - Test daily verse
+
+*💡 Topics:*
+salvation, love, faith, prayer, hope, peace, strength, forgiveness, fear, healing, wisdom, anxiety, joy
+""")
+
+# Static responses are rendered once, at import.
+HELP_MESSAGE = HELP.render()
+
+VERSE = Template("📖 *{reference}*\n\n_{text}_")
+VERSE_BLOCK = Template("📖 *{reference}*\n_{text}_\n\n")
+NUMBERED_VERSE = Template("*{verse}.* {text}\n")
+RANDOM_VERSE = Template("🎲 *Random Verse*\n\n📖 *{reference}*\n\n_{text}_")
+
+VOTD_HEADINGS = {
+    "votd": "🌅 *Verse of the Day*",
+    "test": "🌅 *Test Daily Verse*",
+    "daily": "🌅 *Good Morning! Daily Verse*",
+}
+VOTD_FOOTERS = {
+    "daily": "\n\n_Reply /unsubscribe to stop daily verses_",
+}
+VOTD = {
+    variant: Template(
+        heading + "\n📅 _{date}_\n\n📖 *{reference}*\n\n_{text}_\n\n🙏 Have a blessed day!" + VOTD_FOOTERS.get(variant, "")
+    )
+    for variant, heading in VOTD_HEADINGS.items()
+}
+
+DID_YOU_MEAN = Template("🤔 Did you mean *{suggestion}*?\n\n")
+SEARCH_TITLE = Template("🔍 *Found {count} verse(s) for '{keyword}':*\n\n")
+BOOK_TITLE = Template("📚 *Verses from {book}:*\n\n")
+PAGE_NUMBER = Template("_Page {page} of {pages}_\n\n")
+CHAPTER_TITLE = Template("📖 *{book} Chapter {chapter}*\n\n")
+CHAPTER_VERSE = Template("*{verse}.* {text}\n\n")
+PASSAGE_TITLE = Template("📖 *{reference}*\n")
+PASSAGE_NOT_FOUND = Template("❌ Not found: {reference}\n\n")
+PASSAGE_TRUNCATED = Template("_(Showing {shown} of {total} verses)_")
+
+TOPIC_LINE = Template("{number}. {topic}\n")
+TOPICS = Template("📚 *Available Topics:*\n\n{topics}\n*Usage:* /topic <name>\n*Example:* /topic salvation")
+TOPIC_PROMPT = Template("Please provide a topic name.\n\n*Available topics:*\n{topics}\n\n*Example:* /topic salvation")
+TOPIC_NOT_FOUND = Template("❌ Topic '{topic}' not found.\n\n*Available topics:*\n{topics}")
+TOPIC_TITLE = Template("📚 *Topic: {topic}*\n\n")
+BOOKS = Template(
+    "📚 *Bible Books*\n\n*Old Testament (39):*\n{old_first}\n{old_rest}\n\n*New Testament (27):*\n{new}"
+)
+
+TIMEZONE_LINE = Template("{key}. {name}\n")
+TIMEZONE_MENU = Template(
+    "🌍 *Select Your Timezone*\n\n{options}\n*Usage:* /settimezone <number>\n*Example:* /settimezone 1"
+)
+TIMEZONE_FIRST = Template(
+    "🌍 *Please set your timezone first!*\n\n{options}\n*Usage:* /settimezone <number>\n"
+    "*Example:* /settimezone 1\n\nThen use /subscribe again!"
+)
+TIMEZONE_UPDATED = Template(
+    "✅ *Timezone updated!*\n\n🌍 {timezone}\n⏰ You'll receive daily verses at 6:00 AM your local time!"
+)
+TIMEZONE_SET = Template("✅ *Timezone set!*\n\n🌍 {timezone}\n\nNow use /subscribe to receive daily verses at 6 AM!")
+SUBSCRIBED = Template(
+    "🎉 *Successfully subscribed!*\n\n🌍 Timezone: {timezone}\n⏰ Daily verse at 6:00 AM your local time!\n\n"
+    "👥 Total subscribers: {total}\n\nUse /settimezone to change timezone\nUse /unsubscribe to stop\n"
+    "Use /votd to get today's verse now!"
+)
+UNSUBSCRIBED_MESSAGE = Template(
+    "👋 *Successfully unsubscribed*\n\nYou will no longer receive daily verses.\n\n"
+    "Use /subscribe anytime to start again!"
+).render()
+STATUS_SUBSCRIBED = Template(
+    "✅ *You are subscribed!*\n\n🌍 Timezone: {timezone}\n⏰ Daily verse: 6:00 AM your local time\n"
+    "📬 Today's verse: {delivered}\n👥 Total subscribers: {total}\n\n"
+    "Use /settimezone to change timezone\nUse /unsubscribe to stop."
+)
+STATUS_NOT_SUBSCRIBED_MESSAGE = Template(
+    "❌ *You are not subscribed*\n\nUse /settimezone to set your timezone\n"
+    "Then /subscribe to get daily verses at 6 AM!"
+).render()
+DEBUG_INFO = Template(
+    "🔍 *Debug Info:*\n\n📍 Your timezone: `{timezone}`\n🕐 Your local time: `{time}`\n"
+    "📅 Your local date: `{date}`\n\nSending test verse now..."
+)
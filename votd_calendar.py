@@ -0,0 +1,95 @@
+import random
+import sqlite3
+import sys
+from datetime import date, timedelta
+
+
+DB_PATH = "bible.db"
+VOTD_SEED = 316
+CALENDAR_DAYS = 366
+MIN_VERSE_LENGTH = 40
+
+# Genealogies and census lists make poor verses of the day.
+SKIPPED_CHAPTERS = {
+    "Genesis": {5, 10, 11, 36, 46},
+    "Numbers": {1, 2, 3, 7, 26, 33},
+    "1 Chronicles": {1, 2, 3, 4, 5, 6, 7, 8, 9},
+    "Ezra": {2, 10},
+    "Nehemiah": {3, 7, 11, 12},
+    "Matthew": {1},
+    "Luke": {3},
+}
+
+
+def create_calendar_table(cursor):
+    # Keyed by reference rather than verses.id, so a re-import keeps the calendar valid.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS votd_calendar (
+            day TEXT PRIMARY KEY,
+            book_id INTEGER NOT NULL,
+            chapter INTEGER NOT NULL,
+            verse INTEGER NOT NULL
+        )
+    ''')
+
+
+def _candidates(cursor):
+    cursor.execute('''
+        SELECT v.book_id, v.chapter, v.verse, v.text, b.book_name
+        FROM verses v
+        JOIN books b ON v.book_id = b.book_id
+        ORDER BY v.book_id, v.chapter, v.verse
+    ''')
+    candidates = []
+    for book_id, chapter, verse, text, book_name in cursor.fetchall():
+        if chapter in SKIPPED_CHAPTERS.get(book_name, ()):
+            continue
+        if len(text) < MIN_VERSE_LENGTH or "begat" in text.lower():
+            continue
+        candidates.append((book_id, chapter, verse))
+    return candidates
+
+
+def extend_calendar(cursor, start, days, seed=VOTD_SEED):
+    # Fills start..start+days-1 where missing, never repeating a verse already
+    # in the calendar. Seeded from the start date, so reruns give the same days.
+    create_calendar_table(cursor)
+    cursor.execute("SELECT day, book_id, chapter, verse FROM votd_calendar")
+    rows = cursor.fetchall()
+    filled = {row[0] for row in rows}
+    used = {row[1:] for row in rows}
+    missing = [
+        (start + timedelta(days=offset)).isoformat() for offset in range(days)
+        if (start + timedelta(days=offset)).isoformat() not in filled
+    ]
+    if not missing:
+        return 0
+    candidates = [reference for reference in _candidates(cursor) if reference not in used]
+    if not candidates:
+        return 0
+    rng = random.Random(seed * 1000003 + start.toordinal())
+    if len(candidates) >= len(missing):
+        picks = rng.sample(candidates, len(missing))
+    else:
+        picks = [rng.choice(candidates) for _ in missing]
+    cursor.executemany(
+        "INSERT INTO votd_calendar (day, book_id, chapter, verse) VALUES (?, ?, ?, ?)",
+        [(day,) + reference for day, reference in zip(missing, picks)]
+    )
+    return len(missing)
+
+
+def ensure_calendar(db_path=DB_PATH, start=None, days=CALENDAR_DAYS):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    added = extend_calendar(cursor, start or date.today(), days)
+    conn.commit()
+    conn.close()
+    return added
+
+
+if __name__ == "__main__":
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    print(f"📅 Generating verse of the day calendar for {years} year(s)...")
+    added = ensure_calendar(DB_PATH, date.today(), 366 * years)
+    print(f"✅ Added {added} day(s)")